@@ -0,0 +1,174 @@
+"""Admission control: per-class concurrency limits for heavy endpoints.
+
+Every HTTP request is put in a class by method and path (see ``RULES``):
+
+    bulk         spreadsheet uploads and batch scheduling
+    graduation   graduation checks, simulations and schedules
+    analytics    /api/analytics/*
+    interactive  everything else
+
+Each class has its own concurrency limit and wait queue, so a few bulk
+uploads cannot take the Supabase connection and rate budget that page
+loads need.  A request waits for a slot up to the class timeout; if it
+is still waiting then, or the queue is already full, it gets a 429 with a
+``Retry-After`` estimated from recent service times.
+
+Limits, timeouts and queue lengths are overridable per class, e.g.
+``ADMISSION_LIMITS=bulk=1,analytics=2``, ``ADMISSION_TIMEOUTS=bulk=60`` and
+``ADMISSION_QUEUE=bulk=10``; a limit of 0 turns a class's limit off.  Queue
+depth, in-flight counts and wait times are kept for ``/api/metrics``.
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_LIMITS = {"bulk": 2, "graduation": 8, "analytics": 4, "interactive": 64}
+DEFAULT_TIMEOUTS = {"bulk": 30.0, "graduation": 10.0, "analytics": 10.0, "interactive": 5.0}
+DEFAULT_QUEUE = {"bulk": 20, "graduation": 100, "analytics": 50, "interactive": 500}
+
+# (class, methods or None for any, path pattern); first match wins
+RULES: List[Tuple[str, Optional[set], "re.Pattern"]] = [
+    ("bulk", {"POST"}, re.compile(r"^/api/upload-|^/students/bulk-|^/students/[^/]+/upload-units|^/api/students/schedule/batch$")),
+    ("graduation", None, re.compile(r"^/students/[^/]+/graduate|^/api/students/[^/]+/schedule$")),
+    ("analytics", None, re.compile(r"^/api/analytics/")),
+]
+EXEMPT_PATHS = ("/ping", "/api/metrics")
+
+
+def _env_map(name: str, cast) -> Dict[str, float]:
+    values = {}
+    for part in os.getenv(name, "").split(","):
+        key, _, value = part.partition("=")
+        if key.strip() and value.strip():
+            values[key.strip()] = cast(value.strip())
+    return values
+
+
+def classify(method: str, path: str) -> str:
+    for name, methods, pattern in RULES:
+        if (methods is None or method in methods) and pattern.search(path):
+            return name
+    return "interactive"
+
+
+class AdmissionClass:
+    def __init__(self, name: str, limit: int, timeout: float, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.service_ewma = 0.0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily so it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: queued work ahead, spread over the slots."""
+        service = self.service_ewma or 1.0
+        return max(1, math.ceil(service * (self.waiting + 1) / max(self.limit, 1)))
+
+    def record_service(self, seconds: float) -> None:
+        self.service_ewma = seconds if not self.service_ewma else 0.8 * self.service_ewma + 0.2 * seconds
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(1000 * self.wait_total / self.admitted, 2) if self.admitted else 0.0,
+            "max_wait_ms": round(1000 * self.wait_max, 2),
+            "avg_service_ms": round(1000 * self.service_ewma, 2),
+        }
+
+
+classes: Dict[str, AdmissionClass] = {}
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    return {name: c.stats() for name, c in classes.items()}
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, exclude_paths: Iterable[str] = ()):
+        self.app = app
+        self.exclude_paths = tuple(EXEMPT_PATHS) + tuple(exclude_paths)
+        limits = {**DEFAULT_LIMITS, **_env_map("ADMISSION_LIMITS", int)}
+        timeouts = {**DEFAULT_TIMEOUTS, **_env_map("ADMISSION_TIMEOUTS", float)}
+        queues = {**DEFAULT_QUEUE, **_env_map("ADMISSION_QUEUE", int)}
+        for name, limit in limits.items():
+            classes[name] = AdmissionClass(name, limit, timeouts.get(name, 10.0), queues.get(name, 100))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths) or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        klass = classes.get(classify(scope["method"], scope["path"]))
+        if klass is None or klass.limit <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        semaphore = klass.semaphore
+        queued_at = time.monotonic()
+        if not semaphore.locked():
+            await semaphore.acquire()  # a free slot: no wait, no queue
+        elif klass.waiting >= klass.max_queue:
+            klass.rejected += 1
+            await self._reject(send, klass, "queue full")
+            return
+        else:
+            klass.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=klass.timeout)
+            except asyncio.TimeoutError:
+                klass.timed_out += 1
+                klass.rejected += 1
+                await self._reject(send, klass, "timed out waiting for a slot")
+                return
+            finally:
+                klass.waiting -= 1
+
+        waited = time.monotonic() - queued_at
+        klass.admitted += 1
+        klass.wait_total += waited
+        klass.wait_max = max(klass.wait_max, waited)
+        klass.active += 1
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            klass.active -= 1
+            klass.record_service(time.monotonic() - started)
+            semaphore.release()
+
+    async def _reject(self, send, klass: AdmissionClass, reason: str) -> None:
+        body = json.dumps({"detail": f"Server busy ({klass.name} requests): {reason}. Please retry shortly."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(klass.retry_after()).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,252 @@
+"""Cohort-level analytics computed in bulk with pandas.
+
+``unit_demand`` answers "how many students still need each unit" for a
+whole cohort at once: one merge of students onto their planners' units,
+an anti-join against passed transcript rows and a group-by, instead of
+running ``graduation.evaluate_progress`` once per student.  The rules
+(MPU variants, passing grades, elective placeholders filled by extra
+passed units) are the same as the per-student progress view.
+
+The dashboard summaries further down (``overview``, ``graduation_summary``,
+``grade_distribution``, ``unit_performance``, ``graduation_trends``,
+``program_breakdown``) take DataFrames from ``analytics_snapshot`` and
+return exactly what the row-by-row endpoints in ``main`` return.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from graduation import progress_student_type
+from lazy_imports import LazyModule
+from transcript_store import TranscriptStore
+
+pd = LazyModule("pandas")
+
+STUDENT_COLUMNS = ["student_id", "student_course", "student_major", "intake_year", "intake_term",
+                   "student_type", "has_spm_bm_credit", "graduation_status"]
+PLANNER_COLUMNS = ["id", "program", "major", "intake_year", "intake_semester"]
+PLANNER_UNIT_COLUMNS = ["planner_id", "unit_code", "unit_name", "unit_type"]
+STUDENT_UNIT_COLUMNS = ["student_id", "unit_code", "grade"]
+
+# same sets as graduation.evaluate_progress / graduation.is_passed
+PLACEHOLDER_CODES = ["0", "nan", "", "none", "—"]
+FAIL_GRADES = ["N", "F", "FAIL", "", "NAN", " ", "N "]
+ELECTIVE_CODE = "ELECTIVE"
+MATCH_KEYS = ["program", "major", "intake_year", "intake_semester"]
+
+
+def _as_str(series):
+    return series.astype(object).where(series.notna(), None).map(str)
+
+
+def _spm_credit(series):
+    # a handful of distinct values, so map them through the scalar rule once each
+    lookup = {v: progress_student_type({"has_spm_bm_credit": v})[1] for v in series.astype(object).unique()}
+    return series.astype(object).map(lookup).astype(bool)
+
+
+def required_units(students: List[dict], planners: List[dict], planner_units: List[dict]):
+    """One row per (non-graduated student, applicable planner unit)."""
+    st = pd.DataFrame(students, columns=STUDENT_COLUMNS)
+    st = st[~st["graduation_status"].fillna(False).astype(bool)]
+    st = st.assign(
+        student_type=st["student_type"].fillna("").astype(str).str.strip().str.lower().replace("", "malaysian"),
+        spm_credit=_spm_credit(st["has_spm_bm_credit"]),
+        program=st["student_course"], major=st["student_major"], intake_semester=st["intake_term"],
+    )
+    pl = pd.DataFrame(planners, columns=PLANNER_COLUMNS).rename(columns={"id": "planner_id"})
+    for frame in (st, pl):
+        for key in MATCH_KEYS:
+            frame[key] = _as_str(frame[key])
+    # the progress view takes the first planner matching the intake
+    pl = pl.drop_duplicates(MATCH_KEYS, keep="first")
+
+    pu = pd.DataFrame(planner_units, columns=PLANNER_UNIT_COLUMNS)
+    req = st.merge(pl, on=MATCH_KEYS).merge(pu, on="planner_id")
+    req["unit_code"] = _as_str(req["unit_code"])
+
+    code = req["unit_code"].str.upper()
+    malaysian = req["student_type"] == "malaysian"
+    excluded = code.str.contains("MPU", regex=False) & (
+        (code.str.startswith("MPU321") & (~malaysian | req["spm_credit"]))
+        | (code.str.startswith("MPU318") & ~malaysian)
+        | (code.str.startswith("MPU314") & malaysian)
+    )
+    req = req[~excluded]
+    req["placeholder"] = req["unit_code"].str.lower().isin(PLACEHOLDER_CODES)
+    return req.reset_index(drop=True)
+
+
+def remaining_units(req, student_units: List[dict]):
+    """Rows of ``req`` the student has not yet completed (vectorised anti-join).
+
+    ``student_units`` may also be a ``transcript_store.TranscriptStore``.
+    """
+    if isinstance(student_units, TranscriptStore):
+        su = student_units.to_frame(STUDENT_UNIT_COLUMNS)
+    else:
+        su = pd.DataFrame(student_units, columns=STUDENT_UNIT_COLUMNS)
+    su = su[su["unit_code"].notna() & (su["unit_code"] != "")]
+    su = su.assign(unit_code=su["unit_code"].astype(str),
+                   passed=~su["grade"].fillna("").astype(str).str.upper().isin(FAIL_GRADES))
+
+    # a planner unit counts once the student's (last) row for that code is passed
+    latest = su.drop_duplicates(["student_id", "unit_code"], keep="last")
+    done = latest.loc[latest["passed"], ["student_id", "unit_code"]].assign(done=True)
+    req = req.merge(done, on=["student_id", "unit_code"], how="left")
+    req["done"] = req["done"].fillna(False).astype(bool)
+
+    # elective placeholders are filled, in planner order, by passed units outside the planner
+    extra = su.loc[su["passed"] & (su["unit_code"] != "AIMFECS"), ["student_id", "unit_code"]].drop_duplicates()
+    extra = extra.merge(req[["student_id", "unit_code"]].drop_duplicates(), how="left", indicator=True)
+    extra_counts = extra[extra["_merge"] == "left_only"].groupby("student_id").size()
+
+    open_slots = req["placeholder"] & ~req["done"]
+    rank = open_slots.astype(int).groupby(req["student_id"]).cumsum() - 1
+    filled = open_slots & (rank < req["student_id"].map(extra_counts).fillna(0))
+    return req[~req["done"] & ~filled]
+
+
+def unit_demand(students: List[dict], planners: List[dict], planner_units: List[dict],
+                student_units: List[dict], units: Optional[List[dict]] = None,
+                term: Optional[str] = None) -> Dict[str, Any]:
+    """Remaining-unit counts per unit code, broken down by intake and major.
+
+    With ``term`` (and the ``units`` catalogue) only units whose
+    ``offered_terms`` mention the term are counted; units missing from the
+    catalogue, including elective placeholders, are always counted.
+    """
+    req = required_units(students, planners, planner_units)
+    remaining = remaining_units(req, student_units)
+    remaining = remaining.assign(
+        unit_code=remaining["unit_code"].where(~remaining["placeholder"], ELECTIVE_CODE),
+        intake_year=remaining["intake_year"], intake_term=remaining["intake_semester"],
+    )
+
+    if term and units is not None:
+        catalogue = pd.DataFrame(units, columns=["unit_code", "offered_terms"])
+        offered = catalogue["offered_terms"].fillna("").astype(str).str.contains(term, case=False, regex=False)
+        keep = ~remaining["unit_code"].isin(catalogue["unit_code"]) | remaining["unit_code"].isin(
+            catalogue.loc[offered, "unit_code"])
+        remaining = remaining[keep]
+
+    totals = (remaining.groupby("unit_code")
+              .agg(unit_name=("unit_name", "first"), unit_type=("unit_type", "first"), demand=("student_id", "size"))
+              .sort_values("demand", ascending=False))
+    by_intake = remaining.groupby(["unit_code", "intake_year", "intake_term"]).size()
+    by_major = remaining.groupby(["unit_code", "major"]).size()
+
+    intake_rows: Dict[str, list] = {}
+    for (code, year, intake_term), count in by_intake.items():
+        intake_rows.setdefault(code, []).append({"intake_year": year, "intake_term": intake_term, "count": int(count)})
+    major_rows: Dict[str, list] = {}
+    for (code, major), count in by_major.items():
+        major_rows.setdefault(code, []).append({"major": major, "count": int(count)})
+
+    return {
+        "term": term,
+        "students": int(req["student_id"].nunique()),
+        "units": [
+            {
+                "unit_code": code,
+                "unit_name": None if code == ELECTIVE_CODE else row.unit_name,
+                "unit_type": row.unit_type,
+                "demand": int(row.demand),
+                "by_intake": intake_rows.get(code, []),
+                "by_major": major_rows.get(code, []),
+            }
+            for code, row in totals.iterrows()
+        ],
+    }
+
+
+# ----- dashboard summaries over snapshot frames -----
+
+GRADE_POINTS = {"A+": 4.0, "A": 4.0, "A-": 3.7, "B+": 3.3, "B": 3.0, "B-": 2.7,
+                "C+": 2.3, "C": 2.0, "C-": 1.7, "D": 1.0, "F": 0.0}
+
+
+def _or(series, default):
+    """``value or default`` per element."""
+    return series.where(series.notna() & (series != ""), default)
+
+
+def _truthy(series):
+    return series.fillna(False).astype(bool)
+
+
+def _cohort_keys(students, *columns):
+    defaults = {"student_course": "Unknown", "student_major": "Unknown", "intake_year": "Unknown", "intake_term": "Unknown"}
+    return [_or(students[c], defaults[c]) for c in columns]
+
+
+def overview(students) -> Dict[str, Any]:
+    year = _or(students["intake_year"], "Unknown")
+    graduated = _truthy(students["graduation_status"])
+    by_year = year.value_counts()
+    active = ~graduated
+    by_program_major = pd.DataFrame({
+        "program": _or(students["student_course"], "Unknown Program")[active],
+        "major": _or(students["student_major"], "Unknown Major")[active],
+        "intake_year": year[active],
+    }).groupby(["program", "major", "intake_year"], sort=False).size()
+    by_status = graduated.groupby(year).agg(["sum", "size"])
+    return {
+        "students_by_year": [{"intake_year": k, "total_students": int(v)} for k, v in sorted(by_year.items())],
+        "students_by_program_major": [
+            {"program": p, "major": m, "intake_year": y, "total_students": int(v)}
+            for (p, m, y), v in by_program_major.items()
+        ],
+        "graduation_by_year": [
+            {"intake_year": k, "graduated": int(v["sum"]), "not_graduated": int(v["size"] - v["sum"])}
+            for k, v in sorted(by_status.iterrows(), key=lambda x: x[0])
+        ],
+    }
+
+
+def graduation_summary(students) -> List[Dict[str, Any]]:
+    graduated = students[_truthy(students["graduation_status"])]
+    counts = pd.Series(1, index=graduated.index).groupby(
+        _cohort_keys(graduated, "student_course", "student_major", "intake_year"), sort=False).size()
+    return [{"program": p, "major": m, "year": y, "graduates": int(v)} for (p, m, y), v in counts.items()]
+
+
+def grade_distribution(student_units, unit_code: Optional[str] = None) -> Dict[str, Any]:
+    codes = student_units["unit_code"]
+    available = codes[codes.notna() & (codes != "")].astype(str).str.strip().unique()
+    rows = student_units[codes == unit_code.strip()] if unit_code else student_units
+    grades = _or(rows["grade"], "Unknown").astype(str).str.strip()
+    counts = grades.groupby(grades, sort=False).size()
+    return {"grades": {g: int(v) for g, v in counts.items()}, "available_units": sorted(available)}
+
+
+def unit_performance(student_units) -> List[Dict[str, Any]]:
+    grades = _or(student_units["grade"], "N/A").astype(str).str.upper()
+    per_unit = pd.DataFrame({
+        "unit_code": _or(student_units["unit_code"], "Unknown"),
+        "unit_name": _or(student_units["unit_name"], ""),
+        "points": grades.map(GRADE_POINTS).fillna(0.0),
+        "completed": _truthy(student_units["completed"]),
+    }).groupby("unit_code", sort=False).agg(
+        unit_name=("unit_name", "first"), points=("points", "sum"),
+        completed=("completed", "sum"), total=("completed", "size"))
+    return [
+        {"unit_code": code, "unit_name": row.unit_name, "avg_grade": round(row.points / row.total, 2),
+         "completion_rate": round((row.completed / row.total) * 100, 1)}
+        for code, row in per_unit.iterrows()
+    ]
+
+
+def graduation_trends(students) -> List[Dict[str, Any]]:
+    year = _or(students["intake_year"], "Unknown").astype(str)
+    by_status = _truthy(students["graduation_status"]).groupby(year, sort=False).agg(["sum", "size"])
+    trends = sorted(by_status.iterrows(), key=lambda x: int(x[0]) if x[0].isdigit() else 9999)
+    return [{"year": y, "graduated": int(v["sum"]), "not_graduated": int(v["size"] - v["sum"])} for y, v in trends]
+
+
+def program_breakdown(students) -> List[Dict[str, Any]]:
+    keys = _cohort_keys(students, "student_course", "student_major", "intake_year", "intake_term")
+    by_status = _truthy(students["graduation_status"]).groupby(keys, sort=False).agg(["size", "sum"])
+    return [
+        {"program": p, "major": m, "intake_year": y, "intake_term": t, "total": int(v["size"]), "graduated": int(v["sum"])}
+        for (p, m, y, t), v in by_status.iterrows()
+    ]
@@ -0,0 +1,307 @@
+"""Local columnar snapshot of the operational tables for the analytics endpoints.
+
+Dashboards re-read whole tables on every refresh.  Instead of sending
+those reads to Supabase, the ``/api/analytics/*`` endpoints answer from a
+snapshot of ``students``, ``student_units``, ``study_planners``,
+``study_planner_units`` and the ``units`` catalogue, held as pandas
+DataFrames and written as Parquet to ``ANALYTICS_SNAPSHOT_DIR`` (default
+a directory per Supabase project in a private per-user directory, see
+``private_dir``) so a restarted worker starts with the last snapshot.  The
+directory is created 0700 and is only read or written while it is owned by
+this user and not writable by anyone else.  Without pyarrow, or without a
+private directory, the snapshot stays in memory (there is no pickle
+fallback: loading a pickle runs code).
+
+A background thread refreshes the snapshot every
+``ANALYTICS_SNAPSHOT_INTERVAL`` seconds (default 60):
+
+* rows created since the last refresh are paged in by ``created_at``
+  (with ``OVERLAP`` seconds of overlap, de-duplicated by primary key);
+* rows this app changed or deleted are known from the cache
+  invalidations (``mark_dirty``), and only those students / planners are
+  re-read;
+* every ``ANALYTICS_SNAPSHOT_FULL_INTERVAL`` seconds (default 6 hours) the
+  tables are re-read in full, for edits made outside the app.
+
+Answers are therefore up to one interval old.  ``ANALYTICS_SNAPSHOT=off``
+sends every analytics request to Supabase again.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import private_dir
+from lazy_imports import LazyModule
+
+pd = LazyModule("pandas")
+
+ENABLED = os.getenv("ANALYTICS_SNAPSHOT", "on").strip().lower() not in ("off", "0", "false", "no")
+DIRECTORY = os.getenv("ANALYTICS_SNAPSHOT_DIR")  # None: private_dir.private_path("analytics-snapshot")
+INTERVAL = float(os.getenv("ANALYTICS_SNAPSHOT_INTERVAL", "60"))
+FULL_INTERVAL = float(os.getenv("ANALYTICS_SNAPSHOT_FULL_INTERVAL", str(6 * 3600)))
+OVERLAP = 60.0  # seconds re-read before the watermark, for rows committed late
+
+# key: primary key; group: the column dirty ids refer to (all rows with that value are re-read)
+TABLES: Dict[str, Dict[str, Any]] = {
+    "students": {
+        "key": "student_id", "group": "student_id",
+        "columns": ["student_id", "student_course", "student_major", "intake_year", "intake_term",
+                    "student_type", "has_spm_bm_credit", "graduation_status", "created_at"],
+    },
+    "student_units": {
+        "key": "id", "group": "student_id",
+        "columns": ["id", "student_id", "unit_code", "unit_name", "grade", "completed", "created_at"],
+    },
+    "study_planners": {
+        "key": "id", "group": "id",
+        "columns": ["id", "program", "major", "intake_year", "intake_semester", "created_at"],
+    },
+    "study_planner_units": {
+        "key": "id", "group": "planner_id",
+        "columns": ["id", "planner_id", "row_index", "unit_code", "unit_name", "unit_type", "created_at"],
+    },
+    "units": {
+        "key": "id", "group": "unit_code",
+        "columns": ["id", "unit_code", "unit_name", "offered_terms", "created_at"],
+    },
+}
+
+ALL = "*"  # mark_dirty(table, ALL): re-read the whole table
+
+FetchPages = Callable[..., Iterator[List[dict]]]      # (table, columns, order=, since=) -> pages
+FetchIn = Callable[..., List[dict]]                   # (table, columns, column, values, order=) -> every row, paged
+
+
+def file_format() -> Optional[str]:
+    """"parquet", or None when pyarrow is missing and the snapshot is kept in memory only."""
+    try:
+        import pyarrow  # noqa: F401
+        return "parquet"
+    except ImportError:
+        return None
+
+
+class AnalyticsSnapshot:
+    def __init__(self, directory: Optional[str] = DIRECTORY, interval: float = INTERVAL,
+                 full_interval: float = FULL_INTERVAL, enabled: bool = ENABLED,
+                 source: Optional[str] = os.getenv("SUPABASE_URL")):
+        self.directory = directory
+        self.source = source
+        self.interval = interval
+        self.full_interval = full_interval
+        self.enabled = enabled
+        self.format = file_format()
+        self.frames: Dict[str, Any] = {}
+        self.watermarks: Dict[str, Optional[str]] = {}
+        self.refreshed_at: Optional[float] = None
+        self.full_at: Optional[float] = None
+        self._dirty: Dict[str, set] = {table: set() for table in TABLES}
+        self._lock = threading.Lock()        # frames / dirty sets
+        self._refresh_lock = threading.Lock()  # one refresh at a time
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats: Dict[str, Any] = {"refreshes": 0, "full_refreshes": 0, "rows_fetched": 0, "errors": 0,
+                                      "last_refresh_ms": 0.0, "served": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and len(self.frames) == len(TABLES)
+
+    def age(self) -> Optional[float]:
+        return None if self.refreshed_at is None else time.time() - self.refreshed_at
+
+    def frame(self, table: str):
+        """The snapshot of ``table`` (do not modify it; refreshes replace frames, never mutate them)."""
+        return self.frames[table]
+
+    # ----- change tracking -----
+
+    def mark_dirty(self, table: str, values: Iterable = (ALL,)) -> None:
+        """Rows of ``table`` whose group column has one of ``values`` changed; re-read them next refresh."""
+        with self._lock:
+            self._dirty[table].update(v for v in values if v is not None)
+
+    # ----- refreshing -----
+
+    def refresh(self, fetch_pages: FetchPages, fetch_in: FetchIn, full: bool = False) -> Dict[str, int]:
+        """Bring the snapshot up to date and save it; returns the rows fetched per table."""
+        with self._refresh_lock:
+            started = time.perf_counter()
+            full = full or not self.ready or self.full_at is None or time.time() - self.full_at >= self.full_interval
+            with self._lock:
+                dirty, self._dirty = self._dirty, {table: set() for table in TABLES}
+            try:
+                fetched = {}
+                frames, watermarks = dict(self.frames), dict(self.watermarks)
+                for table, spec in TABLES.items():
+                    whole = full or ALL in dirty[table] or table not in frames
+                    frames[table], fetched[table] = self._refresh_table(
+                        table, spec, None if whole else frames[table], watermarks.get(table), dirty[table],
+                        fetch_pages, fetch_in)
+                    watermarks[table] = _latest(frames[table]) if fetched[table] else watermarks.get(table)
+            except Exception:
+                with self._lock:  # try these again next time
+                    for table, values in dirty.items():
+                        self._dirty[table].update(values)
+                self.stats["errors"] += 1
+                raise
+            now = time.time()
+            with self._lock:
+                self.frames = frames
+                self.watermarks = watermarks
+                self.refreshed_at = now
+                if full:
+                    self.full_at = now
+            self.save()
+            self.stats["refreshes"] += 1
+            self.stats["full_refreshes"] += int(full)
+            self.stats["rows_fetched"] += sum(fetched.values())
+            self.stats["last_refresh_ms"] = round(1000 * (time.perf_counter() - started), 1)
+            return fetched
+
+    def _refresh_table(self, table: str, spec: Dict[str, Any], current, watermark: Optional[str], dirty: set,
+                       fetch_pages: FetchPages, fetch_in: FetchIn):
+        columns, key, group = spec["columns"], spec["key"], spec["group"]
+        select = ", ".join(columns)
+        if current is None:
+            rows: List[dict] = []
+            for page in fetch_pages(table, select, order=key):
+                rows.extend(page)
+            return pd.DataFrame(rows, columns=columns), len(rows)
+
+        parts, fetched = [current], 0
+        if dirty:
+            # re-read every row of the dirty students / planners; rows no longer there were deleted
+            parts[0] = current[~current[group].isin(list(dirty))]
+            rows = fetch_in(table, select, group, sorted(dirty, key=str), order=key)
+            parts.append(pd.DataFrame(rows, columns=columns))
+            fetched += len(rows)
+        if watermark is not None or current.empty:  # rows without created_at wait for the full refresh
+            rows = []
+            # a bulk insert gives many rows the same created_at; the key keeps the pages stable
+            for page in fetch_pages(table, select, order=f"created_at,{key}", since=_before(watermark, OVERLAP)):
+                rows.extend(page)
+            fetched += len(rows)
+            if rows:
+                parts.append(pd.DataFrame(rows, columns=columns))
+        if len(parts) == 1:
+            return current, fetched
+        frame = pd.concat(parts, ignore_index=True).drop_duplicates(key, keep="last")
+        return frame.sort_values(key, kind="stable", ignore_index=True), fetched
+
+    # ----- files -----
+
+    def _path(self, directory: str, table: str) -> str:
+        return os.path.join(directory, f"{table}.parquet")
+
+    def _directory(self) -> Optional[str]:
+        """Where to save and load, or None to keep the snapshot in memory."""
+        if self.format is None:
+            return None
+        # the default is resolved on first use, once SUPABASE_URL is loaded from .env
+        directory = self.directory or private_dir.private_path("analytics-snapshot")
+        if directory is None or not private_dir.ensure_private(directory):
+            return None
+        return directory
+
+    def save(self) -> None:
+        directory = self._directory()
+        if directory is None:
+            return
+        for table, frame in self.frames.items():
+            path = self._path(directory, table)
+            scratch = f"{path}.{os.getpid()}.tmp"
+            frame.to_parquet(scratch, index=False)
+            os.replace(scratch, path)  # other workers never read a half-written file
+        meta = {"format": self.format, "source": self.source, "watermarks": self.watermarks,
+                "refreshed_at": self.refreshed_at, "full_at": self.full_at}
+        scratch = os.path.join(directory, f"meta.json.{os.getpid()}.tmp")
+        with open(scratch, "w") as f:
+            json.dump(meta, f)
+        os.replace(scratch, os.path.join(directory, "meta.json"))
+
+    def load(self) -> bool:
+        """Load the last saved snapshot; False if there is none usable."""
+        directory = self._directory()
+        if directory is None:
+            return False
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("format") != self.format or meta.get("source") != self.source:
+                return False  # other file format, or a snapshot of another database
+            frames = {}
+            for table in TABLES:
+                frames[table] = pd.read_parquet(self._path(directory, table))
+                if list(frames[table].columns) != TABLES[table]["columns"]:
+                    return False  # written by a version with other columns
+        except (OSError, ValueError, KeyError) as e:
+            print("Analytics snapshot not loaded:", e)
+            return False
+        with self._lock:
+            self.frames = frames
+            self.watermarks = meta.get("watermarks") or {}
+            self.refreshed_at = meta.get("refreshed_at")
+            self.full_at = meta.get("full_at")
+        return True
+
+    # ----- background refresh -----
+
+    def start(self, fetch_pages: FetchPages, fetch_in: FetchIn) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(fetch_pages, fetch_in),
+                                        name="analytics-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, fetch_pages: FetchPages, fetch_in: FetchIn) -> None:
+        if not self.load() or (self.age() or 0) >= self.interval:
+            self._refresh_logged(fetch_pages, fetch_in)
+        while not self._stop.wait(self.interval):
+            self._refresh_logged(fetch_pages, fetch_in)
+
+    def _refresh_logged(self, fetch_pages: FetchPages, fetch_in: FetchIn) -> None:
+        try:
+            self.refresh(fetch_pages, fetch_in)
+        except Exception as e:
+            # keep serving the previous snapshot; the next interval tries again
+            print("Analytics snapshot refresh failed:", e)
+
+    def info(self) -> Dict[str, Any]:
+        age = self.age()
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "format": self.format or "memory",
+            "directory": self.directory or private_dir.state_path("analytics-snapshot"),
+            "age_s": None if age is None else round(age, 1),
+            "rows": {table: len(frame) for table, frame in self.frames.items()},
+            "dirty": {table: len(values) for table, values in self._dirty.items() if values},
+            **self.stats,
+        }
+
+
+def _latest(frame) -> Optional[str]:
+    if frame.empty:
+        return None
+    latest = pd.to_datetime(frame["created_at"], errors="coerce", utc=True).max()
+    return None if pd.isna(latest) else latest.isoformat()
+
+
+def _before(watermark: Optional[str], seconds: float) -> Optional[str]:
+    if watermark is None:
+        return None
+    return (pd.Timestamp(watermark) - pd.Timedelta(seconds=seconds)).isoformat()
+
+
+snapshot = AnalyticsSnapshot()
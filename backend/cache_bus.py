@@ -0,0 +1,194 @@
+"""Cache invalidation shared between uvicorn workers on one host.
+
+Every worker process has its own in-process caches (``cache.py``, the
+search index, the completion matrix).  A write handled by one worker
+publishes an invalidation here: it is applied to that worker's caches
+straight away and appended to a change log in a small SQLite file in WAL
+mode (``CACHE_BUS_DB``, default a file per Supabase project in a private
+per-user directory, see ``private_dir``, so deployments sharing a host do
+not apply each other's invalidations).  Every worker polls the log every
+``CACHE_BUS_INTERVAL`` seconds (default 0.2) from a background thread and
+applies the entries other workers wrote, so a change is visible everywhere
+within about one interval.  No external
+service is needed.
+
+Invalidations are named messages with JSON arguments::
+
+    @bus.handler("student")
+    def drop_student(student_id): ...
+
+    bus.publish("student", student_id=42)
+
+Handlers only touch local state and must be idempotent.  Log entries
+older than ``CACHE_BUS_RETENTION`` seconds (default an hour) are pruned;
+a worker that falls further behind than that (or finds the log was
+reset) cannot know what it missed and calls the ``on_resync`` hooks,
+which drop everything.  ``CACHE_BUS=off`` keeps invalidations local.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import private_dir
+
+DB_PATH = os.getenv("CACHE_BUS_DB")  # None: private_dir.private_path("cache-bus", ".sqlite")
+INTERVAL = float(os.getenv("CACHE_BUS_INTERVAL", "0.2"))
+RETENTION = float(os.getenv("CACHE_BUS_RETENTION", "3600"))
+ENABLED = os.getenv("CACHE_BUS", "on").strip().lower() not in ("off", "0", "false", "no")
+PRUNE_EVERY = 200  # publishes between prunes
+
+
+class CacheBus:
+    def __init__(self, path: Optional[str] = DB_PATH, interval: float = INTERVAL, enabled: bool = ENABLED):
+        self.path = path
+        self.interval = interval
+        self.enabled = enabled
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, Callable[..., None]] = {}
+        self._resync_hooks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cursor: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats: Dict[str, Any] = {"published": 0, "applied": 0, "polls": 0, "resyncs": 0, "errors": 0,
+                                      "max_delay_ms": 0.0}
+
+    # ----- registration -----
+
+    def handler(self, name: str):
+        def register(fn: Callable[..., None]) -> Callable[..., None]:
+            self._handlers[name] = fn
+            return fn
+        return register
+
+    def on_resync(self, fn: Callable[[], None]) -> Callable[[], None]:
+        self._resync_hooks.append(fn)
+        return fn
+
+    # ----- publishing -----
+
+    def publish(self, name: str, **args: Any) -> None:
+        """Apply an invalidation here and log it for the other workers."""
+        self._handlers[name](**args)
+        self.stats["published"] += 1
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("INSERT INTO changes (origin, name, args, created_at) VALUES (?, ?, ?, ?)",
+                             (self.origin, name, json.dumps(args, default=str), time.time()))
+                if self.stats["published"] % PRUNE_EVERY == 0:
+                    conn.execute("DELETE FROM changes WHERE created_at < ?", (time.time() - RETENTION,))
+        except sqlite3.Error as e:
+            # other workers fall back on cache TTLs for this change
+            self.stats["errors"] += 1
+            print("Cache bus publish failed:", e)
+
+    # ----- polling -----
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        try:
+            with self._lock:
+                self._cursor = self._connect().execute("SELECT coalesce(max(id), 0) FROM changes").fetchone()[0]
+        except sqlite3.Error as e:
+            self.stats["errors"] += 1
+            print("Cache bus not started:", e)
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print("Cache bus poll failed:", e)
+
+    def poll(self) -> int:
+        """Apply other workers' changes logged since the last poll; returns how many."""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT id, origin, name, args, created_at FROM changes WHERE id > ? ORDER BY id",
+                                (self._cursor or 0,)).fetchall()
+            oldest, newest = conn.execute("SELECT min(id), max(id) FROM changes").fetchone()
+        self.stats["polls"] += 1
+        cursor = self._cursor
+        if cursor is None:  # never started: only what comes next is news
+            self._cursor = newest or 0
+            return 0
+        if (newest or 0) < cursor or (oldest is not None and oldest > cursor + 1):
+            # log recreated, or pruned past us: what changed meanwhile is unknown
+            self._resync()
+            self._cursor = newest or 0
+            return 0
+        applied = 0
+        for change_id, origin, name, args, created_at in rows:
+            self._cursor = change_id
+            if origin == self.origin:
+                continue
+            fn = self._handlers.get(name)
+            if fn is None:
+                continue  # published by a newer deployment; its TTLs cover it
+            try:
+                fn(**json.loads(args))
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Cache bus handler {name} failed:", e)
+                continue
+            applied += 1
+            self.stats["max_delay_ms"] = max(self.stats["max_delay_ms"], round(1000 * (time.time() - created_at), 2))
+        self.stats["applied"] += applied
+        return applied
+
+    def _resync(self) -> None:
+        self.stats["resyncs"] += 1
+        for fn in self._resync_hooks:
+            try:
+                fn()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print("Cache bus resync failed:", e)
+
+    def _connect(self) -> sqlite3.Connection:
+        # caller holds the lock
+        if self._conn is None:
+            # resolved on first use, once SUPABASE_URL is loaded from .env
+            path = self.path or private_dir.private_path("cache-bus", ".sqlite")
+            if path is None:
+                raise sqlite3.OperationalError("no private directory for the cache bus log")
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS changes ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, name TEXT NOT NULL,"
+                " args TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def info(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "worker": self.origin, "cursor": self._cursor, **self.stats}
+
+
+bus = CacheBus()
+handler = bus.handler
+publish = bus.publish
+on_resync = bus.on_resync
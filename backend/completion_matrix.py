@@ -0,0 +1,392 @@
+"""Student x unit completion matrix for cohort-scale requirement analytics.
+
+One row per student and one column per unit code, with NumPy boolean
+arrays for passed / attempted / failed.  Each student row points at a
+requirement set (the planner matched by ``graduation.match_planner`` with
+the student's MPU variant applied), kept as a boolean mask over the same
+columns, so "what is each student missing" is a single ``required & ~passed``.
+
+The same rules as ``graduation.evaluate_graduation`` apply: passed means
+completed and not graded F, elective placeholders are satisfied by units
+outside the requirement set, and graduation needs 300 credits.  Credits
+are summed per transcript row, as the graduation check does.
+
+The matrix is built lazily on first use.  Transcript and student writes
+only mark those students dirty; their rows are re-read and patched on the
+next query.  Planner edits mark the whole matrix stale.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import graduation
+from transcript_store import Transcript, TranscriptStore
+from lazy_imports import LazyModule
+
+np = LazyModule("numpy")
+
+STUDENT_COLUMNS = ("student_id", "student_name", "student_course", "student_major", "intake_year", "intake_term",
+                   "student_type", "has_spm_bm_credit")
+STUDENT_UNIT_COLUMNS = ("student_id", "unit_code", "completed", "grade")
+PLANNER_COLUMNS = ("id", "program", "major", "intake_year", "intake_semester")
+PLANNER_UNIT_COLUMNS = ("planner_id", "unit_code", "unit_name", "unit_type")
+
+# above this share of dirty rows a full rebuild is cheaper than patching rows
+REBUILD_RATIO = 0.2
+
+
+def is_placeholder(code) -> bool:
+    return (graduation.normalize_code(code) in graduation.ELECTIVE_CODES
+            or str(code).lower() in ["0", "nan", "", "none", "—", "null"])
+
+
+class RequirementSet:
+    def __init__(self, planner: dict, required: List[str], placeholders: List[str]):
+        self.planner = planner
+        self.required = required
+        # distinct placeholder codes, by position of their first occurrence; the
+        # graduation check fills placeholders in order, one student unit each
+        first: Dict[str, int] = {}
+        for pos, code in enumerate(placeholders):
+            first.setdefault(code, pos)
+        self.placeholder_positions = sorted(first.values())
+        self.mask = None  # bool[n_units], set once columns are known
+
+
+class CompletionMatrix:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._dirty: Set[int] = set()
+        self.stale = True
+        self.version = 0
+        self.rows: Dict[int, int] = {}
+        self.students: List[Optional[dict]] = []
+        self.unit_codes: List[str] = []
+        self.requirements: List[RequirementSet] = []
+        self.passed = self.attempted = self.failed = None
+
+    def _reset(self):
+        self.codes: Dict[str, int] = {}
+        self.unit_codes: List[str] = []
+        self.unit_names: Dict[str, str] = {}
+        self.rows: Dict[int, int] = {}
+        self.students: List[Optional[dict]] = []
+        self.req_index = np.zeros(0, dtype=np.int32)
+        self.row_credits = np.zeros(0)
+        self.passed = np.zeros((0, 0), dtype=bool)
+        self.attempted = np.zeros((0, 0), dtype=bool)
+        self.failed = np.zeros((0, 0), dtype=bool)
+        self.planners: List[dict] = []
+        self.planner_units: Dict[Any, List[dict]] = {}
+        self.requirements: List[RequirementSet] = []
+        self._requirement_keys: Dict[Tuple, int] = {}
+        self._derived = None
+
+    # ----- building -----
+    def build(self, students: Iterable[dict], student_units: Iterable[dict],
+              planners: List[dict], planner_units: Iterable[dict]) -> None:
+        """Rebuild from scratch; ``student_units`` may be rows or a ``transcript_store.TranscriptStore``."""
+        with self._lock:
+            self._reset()
+            self.planners = list(planners)
+            for unit in planner_units:
+                self.planner_units.setdefault(unit["planner_id"], []).append(unit)
+                if not is_placeholder(unit.get("unit_code")):
+                    code = graduation.normalize_code(unit["unit_code"])
+                    self._column(code)
+                    self.unit_names.setdefault(code, unit.get("unit_name"))
+
+            students = [s for s in students if s.get("student_id") is not None]
+            if isinstance(student_units, TranscriptStore):
+                units_by_student = {int(sid): t for sid, t in student_units.transcripts.items() if sid is not None}
+                for transcript in units_by_student.values():
+                    for code, _, _ in transcript.entries():
+                        self._column(code)
+            else:
+                units_by_student = {}
+                for unit in student_units:
+                    if unit.get("unit_code"):
+                        units_by_student.setdefault(int(unit["student_id"]), []).append(unit)
+                        self._column(graduation.normalize_code(unit["unit_code"]))
+
+            n, m = len(students), len(self.unit_codes)
+            self.passed = np.zeros((n, m), dtype=bool)
+            self.attempted = np.zeros((n, m), dtype=bool)
+            self.failed = np.zeros((n, m), dtype=bool)
+            self.req_index = np.full(n, -1, dtype=np.int32)
+            self.row_credits = np.zeros(n)
+            for student in students:
+                self._set_row(self._row(int(student["student_id"])), student,
+                              units_by_student.get(int(student["student_id"]), []))
+            self._dirty.clear()
+            self.stale = False
+            self._changed()
+
+    def refresh(self, fetch_students: Callable[[List[int]], List[dict]],
+                fetch_units: Callable[[List[int]], List[dict]], rebuild: Callable[[], None]) -> None:
+        """Bring the matrix up to date: full ``rebuild()`` when stale, else patch dirty rows."""
+        with self._lock:
+            if self.stale or len(self._dirty) > max(1, len(self.rows)) * REBUILD_RATIO:
+                rebuild()
+                return
+            if not self._dirty:
+                return
+            ids = sorted(self._dirty)
+            students = {int(s["student_id"]): s for s in fetch_students(ids)}
+            units: Dict[int, List[dict]] = {}
+            for unit in fetch_units(ids):
+                if unit.get("unit_code"):
+                    units.setdefault(int(unit["student_id"]), []).append(unit)
+            for student_id in ids:
+                self.update_student(student_id, students.get(student_id), units.get(student_id, []))
+            self._dirty.difference_update(ids)
+
+    def update_student(self, student_id: int, student: Optional[dict], student_units: List[dict]) -> None:
+        """Replace one student's row; ``student=None`` removes it."""
+        with self._lock:
+            student_id = int(student_id)
+            if student is None:
+                row = self.rows.get(student_id)
+                if row is not None:
+                    self.students[row] = None
+                    self.req_index[row] = -1
+                    self.row_credits[row] = 0
+                    self.passed[row] = self.attempted[row] = self.failed[row] = False
+                    self._changed()
+                return
+            for unit in student_units:
+                if unit.get("unit_code"):
+                    self._column(graduation.normalize_code(unit["unit_code"]))
+            self._grow()
+            self._set_row(self._row(student_id), student, student_units)
+            self._changed()
+
+    def mark_dirty(self, student_ids: Iterable) -> None:
+        with self._lock:
+            self._dirty.update(int(i) for i in student_ids if i is not None)
+
+    def mark_stale(self) -> None:
+        with self._lock:
+            self.stale = True
+
+    # ----- internals (caller holds the lock) -----
+    def _changed(self) -> None:
+        self.version += 1
+        self._derived = None
+
+    def _column(self, code: str) -> int:
+        col = self.codes.get(code)
+        if col is None:
+            col = self.codes[code] = len(self.unit_codes)
+            self.unit_codes.append(code)
+        return col
+
+    def _row(self, student_id: int) -> int:
+        row = self.rows.get(student_id)
+        if row is None:
+            row = self.rows[student_id] = len(self.students)
+            self.students.append(None)
+            self._grow()
+        return row
+
+    def _grow(self) -> None:
+        """Resize arrays after new rows/columns; rows grow by doubling."""
+        n, m = len(self.students), len(self.unit_codes)
+        cap_n, cap_m = self.passed.shape
+        if n <= cap_n and m == cap_m:
+            return
+        new_n = cap_n if n <= cap_n else max(n, cap_n * 2)
+        for name in ("passed", "attempted", "failed"):
+            old = getattr(self, name)
+            grown = np.zeros((new_n, m), dtype=bool)
+            grown[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, grown)
+        req_index = np.full(new_n, -1, dtype=np.int32)
+        req_index[:len(self.req_index)] = self.req_index
+        self.req_index = req_index
+        row_credits = np.zeros(new_n)
+        row_credits[:len(self.row_credits)] = self.row_credits
+        self.row_credits = row_credits
+        for req in self.requirements:
+            req.mask = self._mask(req.required)
+
+    def _mask(self, codes: Iterable[str]):
+        mask = np.zeros(len(self.unit_codes), dtype=bool)
+        mask[[self.codes[c] for c in codes if c in self.codes]] = True
+        return mask
+
+    def _requirement(self, student: dict) -> int:
+        planner = graduation.match_planner(self.planners, student)
+        if planner is None:
+            return -1
+        student_type, has_spm_credit = graduation.graduation_student_type(student)
+        key = (planner["id"], student_type, has_spm_credit)
+        index = self._requirement_keys.get(key)
+        if index is None:
+            units = graduation.filter_mpu_units(self.planner_units.get(planner["id"], []), student_type, has_spm_credit)
+            placeholders = [graduation.normalize_code(u.get("unit_code")) for u in units if is_placeholder(u.get("unit_code"))]
+            required = sorted({graduation.normalize_code(u.get("unit_code")) for u in units
+                               if not is_placeholder(u.get("unit_code"))})
+            for code in required:
+                self._column(code)
+            self._grow()
+            req = RequirementSet(planner, required, placeholders)
+            req.mask = self._mask(required)
+            index = self._requirement_keys[key] = len(self.requirements)
+            self.requirements.append(req)
+        return index
+
+    def _set_row(self, row: int, student: dict, student_units: List[dict]) -> None:
+        self.students[row] = {c: student.get(c) for c in STUDENT_COLUMNS}
+        self.passed[row] = self.attempted[row] = self.failed[row] = False
+        if isinstance(student_units, Transcript):
+            entries = student_units.entries()
+        else:
+            entries = ((graduation.normalize_code(u["unit_code"]), bool(u.get("completed")) and u.get("grade") != "F",
+                        not graduation.is_passed(u.get("grade"))) for u in student_units)
+        for code, passed, failed in entries:
+            col = self.codes[code]
+            self.attempted[row, col] = True
+            if passed:
+                self.passed[row, col] = True
+            elif failed:
+                self.failed[row, col] = True
+        self.row_credits[row] = graduation.total_credits(student_units)
+        self.req_index[row] = self._requirement(student)
+
+    # ----- queries -----
+    def _evaluation(self):
+        """Per-row missing matrix, counts and credits; cached until the next change."""
+        if self._derived is None:
+            n = len(self.students)
+            req_index = self.req_index[:n]
+            active = req_index >= 0
+            masks = np.array([r.mask for r in self.requirements]).reshape(len(self.requirements), len(self.unit_codes))
+            required = masks[req_index.clip(min=0)] & active[:, None] if len(self.requirements) else \
+                np.zeros((n, len(self.unit_codes)), dtype=bool)
+            passed = self.passed[:n]
+            missing = required & ~passed
+            # electives: taken units outside the requirement set fill placeholders in order
+            available = (self.attempted[:n] & ~required).sum(axis=1)
+            elective_missing = np.zeros(n, dtype=np.int64)
+            for index, req in enumerate(self.requirements):
+                rows = np.flatnonzero(req_index == index)
+                positions = np.array(req.placeholder_positions, dtype=np.int64)
+                filled = np.searchsorted(positions, available[rows], side="left")
+                elective_missing[rows] = len(positions) - filled
+            credits = self.row_credits[:n]
+            missing_count = missing.sum(axis=1) + elective_missing
+            can_graduate = active & (missing_count == 0) & (credits >= graduation.MIN_GRADUATION_CREDITS)
+            programs = np.array([graduation.normalize_course_name(s["student_course"]) if s else None
+                                 for s in self.students], dtype=object)
+            intake_years = np.array([str(s["intake_year"]) if s else None for s in self.students], dtype=object)
+            self._derived = {
+                "programs": programs, "intake_years": intake_years,
+                "active": active, "required": required, "missing": missing, "elective_missing": elective_missing,
+                "missing_count": missing_count, "credits": credits, "can_graduate": can_graduate,
+            }
+        return self._derived
+
+    def _cohort(self, program: Optional[str], intake_year: Optional[str]):
+        derived = self._evaluation()
+        selected = derived["active"].copy()
+        if program:
+            selected &= derived["programs"] == graduation.normalize_course_name(program)
+        if intake_year:
+            selected &= derived["intake_years"] == str(intake_year)
+        return derived, selected
+
+    def blockers(self, limit: int = 20, program: Optional[str] = None, intake_year: Optional[str] = None) -> Dict[str, Any]:
+        """Units missing for the most not-yet-eligible students."""
+        with self._lock:
+            derived, selected = self._cohort(program, intake_year)
+            pending = selected & ~derived["can_graduate"]
+            missing = derived["missing"][pending]
+            blocked = missing.sum(axis=0)
+            # students for whom this unit is the only outstanding requirement
+            only = (derived["missing_count"][pending] == 1)
+            sole = missing[only].sum(axis=0)
+            order = np.argsort(-blocked, kind="stable")[:limit]
+            return {
+                "students": int(selected.sum()),
+                "pending_students": int(pending.sum()),
+                "blockers": [
+                    {"unit_code": self.unit_codes[col], "unit_name": self.unit_names.get(self.unit_codes[col]),
+                     "blocked_students": int(blocked[col]), "sole_blocker_students": int(sole[col])}
+                    for col in order if blocked[col] > 0
+                ],
+            }
+
+    def completion(self, program: Optional[str] = None, intake_year: Optional[str] = None) -> Dict[str, Any]:
+        """Completion percentage per required unit and per intake."""
+        with self._lock:
+            derived, selected = self._cohort(program, intake_year)
+            required = derived["required"][selected]
+            done = required & self.passed[:len(self.students)][selected]
+            required_count = required.sum(axis=0)
+            done_count = done.sum(axis=0)
+            per_student_required = required.sum(axis=1)
+            per_student_pct = np.divide(done.sum(axis=1), per_student_required,
+                                        out=np.zeros(len(per_student_required)), where=per_student_required > 0)
+
+            by_intake: Dict[Tuple, List[float]] = {}
+            for pct, row in zip(per_student_pct, np.flatnonzero(selected)):
+                student = self.students[row]
+                by_intake.setdefault((str(student["intake_year"]), student["intake_term"]), []).append(pct)
+
+            return {
+                "students": int(selected.sum()),
+                "eligible_students": int(derived["can_graduate"][selected].sum()),
+                "mean_completion_pct": round(float(per_student_pct.mean()) * 100, 2) if len(per_student_pct) else 0.0,
+                "units": [
+                    {"unit_code": self.unit_codes[col], "unit_name": self.unit_names.get(self.unit_codes[col]),
+                     "required_students": int(required_count[col]), "passed_students": int(done_count[col]),
+                     "completion_pct": round(done_count[col] / required_count[col] * 100, 2)}
+                    for col in np.flatnonzero(required_count)
+                ],
+                "by_intake": [
+                    {"intake_year": year, "intake_term": term, "students": len(values),
+                     "mean_completion_pct": round(sum(values) / len(values) * 100, 2)}
+                    for (year, term), values in sorted(by_intake.items(), key=lambda kv: (kv[0][0], str(kv[0][1])))
+                ],
+            }
+
+    def near_graduation(self, max_missing: int = 2, limit: int = 100, program: Optional[str] = None,
+                        intake_year: Optional[str] = None) -> List[dict]:
+        """Not-yet-eligible students with at most ``max_missing`` outstanding requirements."""
+        with self._lock:
+            derived, selected = self._cohort(program, intake_year)
+            close = selected & ~derived["can_graduate"] & (derived["missing_count"] <= max_missing)
+            rows = np.flatnonzero(close)
+            # fewest missing first, then most credits
+            rows = rows[np.lexsort((-derived["credits"][rows], derived["missing_count"][rows]))][:limit]
+            result = []
+            for row in rows:
+                student = self.students[row]
+                result.append({
+                    "student_id": student["student_id"],
+                    "student_name": student["student_name"],
+                    "program": student["student_course"],
+                    "major": student["student_major"],
+                    "intake_year": student["intake_year"],
+                    "intake_term": student["intake_term"],
+                    "missing_units": [self.unit_codes[c] for c in np.flatnonzero(derived["missing"][row])],
+                    "electives_missing": int(derived["elective_missing"][row]),
+                    "credits": float(derived["credits"][row]),
+                    "credits_short": max(0.0, graduation.MIN_GRADUATION_CREDITS - float(derived["credits"][row])),
+                })
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "students": sum(1 for s in self.students if s is not None),
+            "units": len(self.unit_codes),
+            "requirement_sets": len(self.requirements),
+            "dirty": len(self._dirty),
+            "stale": self.stale,
+            "version": self.version,
+            "bytes": 0 if self.passed is None else int(self.passed.nbytes + self.attempted.nbytes + self.failed.nbytes),
+        }
+
+
+completion_matrix = CompletionMatrix()
@@ -0,0 +1,150 @@
+"""Negotiated gzip/brotli compression for large responses.
+
+A plain ASGI middleware: it buffers single-message responses, and when the
+body is at least ``minimum_size`` bytes and the client accepts it, sends
+it brotli- (if the ``brotli`` package is installed) or gzip-encoded.
+Streaming responses (NDJSON, server-sent events) and bodies that are
+already encoded pass through untouched.
+
+Routes opt out with the ``@uncompressed`` decorator or by path prefix in
+``COMPRESSION_EXCLUDE=/api/upload,/other``.  Bytes in/out per encoding are
+kept in ``stats`` for ``/api/metrics``.
+"""
+
+import gzip
+import os
+from typing import Dict, Iterable, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Bodies above this are compressed off the event loop
+THREAD_THRESHOLD = 256 * 1024
+
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip",
+                      "application/vnd.openxmlformats")
+
+stats: Dict[str, Dict[str, int]] = {}
+
+
+def uncompressed(fn):
+    """Mark an endpoint whose responses must never be compressed."""
+    fn._no_compression = True
+    return fn
+
+
+def _count(key: str, bytes_in: int = 0, bytes_out: int = 0) -> None:
+    entry = stats.setdefault(key, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+    entry["responses"] += 1
+    entry["bytes_in"] += bytes_in
+    entry["bytes_out"] += bytes_out
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            encodings[name.lower()] = q
+    return encodings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    accepted = accepted_encodings(header)
+    star = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", star) > 0:
+        return "br"
+    if accepted.get("gzip", star) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, exclude_paths: Iterable[str] = (),
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        env_excludes = [p.strip() for p in os.getenv("COMPRESSION_EXCLUDE", "").split(",") if p.strip()]
+        self.exclude_paths = tuple(exclude_paths) + tuple(env_excludes)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            reason = self._skip_reason(scope, start_message, message, body)
+            if reason is not None:
+                _count("skipped:" + reason)
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= THREAD_THRESHOLD:
+                compressed = await run_in_threadpool(compress, body, encoding, self.gzip_level, self.brotli_quality)
+            else:
+                compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            _count(encoding, len(body), len(compressed))
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            passthrough = True
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _skip_reason(self, scope, start_message, message, body: bytes) -> Optional[str]:
+        if getattr(scope.get("endpoint"), "_no_compression", False):
+            return "opt_out"
+        if message.get("more_body", False):
+            return "streaming"
+        headers = Headers(raw=start_message["headers"])
+        if "content-encoding" in headers:
+            return "encoded"
+        if start_message["status"] in (204, 304) or len(body) < self.minimum_size:
+            return "small"
+        if headers.get("content-type", "").startswith(SKIP_CONTENT_TYPES):
+            return "content_type"
+        return None
@@ -0,0 +1,63 @@
+"""Fast JSON encoding for large list responses.
+
+Uses orjson when it is installed and falls back to the standard library.
+Handlers return ``FastJSONResponse(data)`` directly, which skips FastAPI's
+``jsonable_encoder`` pass over rows that are already plain JSON from
+Supabase.  ``NDJSONResponse`` streams one row per line for the largest lists.
+"""
+
+import json
+from typing import Any, List, Mapping, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class NDJSONResponse(Response):
+    """Streams ``rows`` as newline-delimited JSON in chunks.
+
+    Unlike ``StreamingResponse`` it can be sent more than once, so it is safe
+    to hand the same instance to coalesced callers.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(self, rows: List[Any], status_code: int = 200, headers: Optional[Mapping[str, str]] = None,
+                 chunk_rows: int = 500):
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+        self.status_code = status_code
+        self.background = None
+        self.body = None  # no Content-Length; the body is chunked
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        for start in range(0, len(self.rows), self.chunk_rows):
+            chunk = b"".join(dumps(row) + b"\n" for row in self.rows[start:start + self.chunk_rows])
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def list_response(rows: List[Any], fmt: Optional[str] = None) -> Response:
+    """Encode a list endpoint's rows as JSON, or as NDJSON when ``?format=ndjson``."""
+    if fmt == "ndjson":
+        return NDJSONResponse(rows)
+    return FastJSONResponse(rows)
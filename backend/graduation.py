@@ -0,0 +1,380 @@
+"""Graduation and progress evaluation.
+
+Pure functions over rows already loaded from Supabase, so the same rules can
+be used by the API handlers, what-if simulations and benchmarks without a
+database round trip.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("uvicorn.error")
+
+ELECTIVE_CODES = ["0", "NAN", "", "NONE", "—", "NULL"]
+MIN_GRADUATION_CREDITS = 300
+
+
+def normalize_code(s):
+    return "" if s is None else str(s).strip().upper()
+
+
+def normalize_type(s):
+    return "" if s is None else str(s).strip().lower()
+
+
+def normalize_course_name(s):
+    return "" if s is None else str(s).strip().lower()
+
+
+def unit_credit(unit_code: str) -> float:
+    # ICT20016 (industry placement) is a double-weighted unit
+    return 25 if unit_code == "ICT20016" else 12.5
+
+
+def filter_mpu_units(units: Iterable[dict], student_type: str, has_spm_credit: bool) -> List[dict]:
+    """Drop the MPU variants that do not apply to this student."""
+    filtered_units = []
+    for unit in units:
+        code = str(unit.get("unit_code", "")).upper()
+
+        if "MPU" in code:
+            if code.startswith("MPU321") and (student_type != "malaysian" or has_spm_credit):
+                continue
+            if code.startswith("MPU318") and student_type != "malaysian":
+                continue
+            if code.startswith("MPU314") and student_type == "malaysian":
+                continue
+
+        filtered_units.append(unit)
+    return filtered_units
+
+
+def match_planner(planners: Iterable[dict], student: dict) -> Optional[dict]:
+    """First planner whose program/major/intake matches the student's."""
+    for p in planners:
+        if (
+            normalize_course_name(p["program"]) == normalize_course_name(student.get("student_course"))
+            and normalize_course_name(p["major"]) == normalize_course_name(student.get("student_major"))
+            and str(p["intake_year"]) == str(student.get("intake_year"))
+            and str(p["intake_semester"]) == str(student.get("intake_term"))
+        ):
+            return p
+    return None
+
+
+def graduation_student_type(student: dict) -> Tuple[str, bool]:
+    student_type = (student.get("student_type") or "malaysian").strip().lower()
+
+    raw_credit = student.get("has_spm_bm_credit", True)
+    if isinstance(raw_credit, str):
+        has_spm_credit = raw_credit.lower() in ["true", "1", "yes", "y"]
+    else:
+        has_spm_credit = bool(raw_credit)
+    return student_type, has_spm_credit
+
+
+def _transcript(student_units):
+    """``student_units`` if it is a ``transcript_store.Transcript``, else None (a list of dicts)."""
+    from transcript_store import Transcript  # transcript_store builds on this module
+    return student_units if isinstance(student_units, Transcript) else None
+
+
+def passed_codes(student_units: Iterable[dict]) -> set:
+    """Codes of passed courses (completed=True and grade not F)."""
+    transcript = _transcript(student_units)
+    if transcript is not None:
+        return transcript.passed_codes()
+    return {
+        normalize_code(u["unit_code"]) for u in student_units
+        if u.get("unit_code") and u.get("completed") and u.get("grade") != "F"
+    }
+
+
+def total_credits(student_units: Iterable[dict]) -> float:
+    transcript = _transcript(student_units)
+    if transcript is not None:
+        return transcript.total_credits()
+    total = 0
+    for unit in student_units:
+        if unit.get("completed") and unit.get("grade") != "F":
+            total += unit_credit(normalize_code(unit["unit_code"]))
+    return total
+
+
+def empty_status(total: float, messages: List[str], **overrides) -> Dict[str, Any]:
+    status = {
+        "can_graduate": False,
+        "total_credits": total,
+        "core_credits": 0.0,
+        "major_credits": 0.0,
+        "core_completed": 0,
+        "major_completed": 0,
+        "mpu_requirements_met": False,
+        "mpu_types_completed": [],
+        "missing_core_units": [],
+        "missing_major_units": [],
+        "messages": messages,
+        "planner_info": "",
+    }
+    status.update(overrides)
+    return status
+
+
+def evaluate_graduation(
+    student: dict,
+    student_units: List[dict],
+    planner: Optional[dict],
+    planner_units: Optional[List[dict]],
+) -> Dict[str, Any]:
+    """Evaluate graduation eligibility; returns the fields of ``GraduationStatus``.
+
+    ``planner`` is the study planner matched to the student (``None`` when no
+    planner exists) and ``planner_units`` its rows.  Nothing is written back.
+    """
+    student_course = student.get("student_course")
+    student_major = student.get("student_major")
+    student_type, has_spm_credit = graduation_student_type(student)
+
+    passed_codes_norm = passed_codes(student_units)
+    # All student course codes (for elective matching)
+    transcript = _transcript(student_units)
+    if transcript is not None:
+        all_student_codes_norm = transcript.normalized_codes()
+    else:
+        all_student_codes_norm = {normalize_code(u["unit_code"]) for u in student_units if u.get("unit_code")}
+
+    if not passed_codes_norm:
+        return empty_status(0, ["No completed units found. Student has not passed any units yet."])
+
+    credits = total_credits(student_units)
+
+    if planner is None:
+        return empty_status(
+            credits,
+            ["No study planner found for this student's course and intake."],
+            missing_core_units=[f"找不到学习计划: {student_course} - {student_major}"],
+            missing_major_units=[f"需要: {student_course} 主修 {student_major}, 入学 {student.get('intake_year')} {student.get('intake_term')}"],
+        )
+
+    planner_id = planner["id"]
+    filtered_units = filter_mpu_units(planner_units or [], student_type, has_spm_credit)
+
+    # 识别所有选修课占位符（包括NAN）
+    elective_placeholders = [
+        u for u in filtered_units
+        if normalize_code(u.get("unit_code")) in ELECTIVE_CODES or
+        str(u.get("unit_code")).lower() in ["0", "nan", "", "none", "—", "null"]
+    ]
+
+    # 首先处理直接匹配的课程（非选修课）
+    required_codes_norm = {normalize_code(unit["unit_code"]) for unit in filtered_units}
+    satisfied_required = required_codes_norm & passed_codes_norm
+
+    # 然后处理选修课占位符：用不在必修课列表中、且尚未被使用的学生课程填充
+    used_for_elective = set()
+    elective_replacements = {}
+    for placeholder in elective_placeholders:
+        placeholder_code = normalize_code(placeholder["unit_code"])
+        available_electives = all_student_codes_norm - required_codes_norm - used_for_elective
+        if available_electives:
+            replacement_course = next(iter(available_electives))
+            satisfied_required.add(placeholder_code)
+            used_for_elective.add(replacement_course)
+            elective_replacements[placeholder_code] = replacement_course
+
+    missing_required = required_codes_norm - satisfied_required
+    logger.debug("Graduation check: %d required, %d satisfied, missing %s",
+                 len(required_codes_norm), len(satisfied_required), missing_required)
+
+    # 毕业条件：完成所有必修科目（包括选修占位符）
+    can_graduate = len(missing_required) == 0 and credits >= MIN_GRADUATION_CREDITS
+
+    core_set = {normalize_code(u["unit_code"]) for u in filtered_units if normalize_type(u["unit_type"]) == "core"}
+    major_set = {normalize_code(u["unit_code"]) for u in filtered_units if normalize_type(u["unit_type"]) == "major"}
+    elective_set = {normalize_code(u["unit_code"]) for u in elective_placeholders}
+
+    completed_core = core_set & satisfied_required
+    completed_major = major_set & satisfied_required
+    completed_elective = elective_set & satisfied_required
+
+    missing_core = core_set - satisfied_required
+    missing_major = major_set - satisfied_required
+    missing_elective = elective_set - satisfied_required
+
+    core_credits = sum(unit_credit(code) for code in completed_core)
+    major_credits = sum(unit_credit(code) for code in completed_major)
+
+    messages = []
+    total_completed = len(satisfied_required)
+    total_required = len(required_codes_norm)
+
+    if can_graduate:
+        messages.append("All required units completed and minimum 300 credits achieved - Eligible for graduation")
+    else:
+        messages.append(f"Not all graduation requirements met: {total_completed}/{total_required} units completed, {credits}/300 credits")
+
+    if len(missing_required) > 0:
+        messages.append(f"Missing {len(missing_required)} required units")
+
+    if credits < MIN_GRADUATION_CREDITS:
+        messages.append(f"Insufficient credits: {credits}/300")
+
+    if elective_replacements:
+        messages.append("Elective replacements: " + ", ".join([f"{k} → {v}" for k, v in elective_replacements.items()]))
+
+    def describe(missing: set, unit_type: str) -> List[str]:
+        details = []
+        for unit_code in missing:
+            unit_info = next((u for u in filtered_units if normalize_code(u["unit_code"]) == unit_code and normalize_type(u["unit_type"]) == unit_type), None)
+            if unit_info:
+                details.append(f"{unit_code} ({unit_info.get('unit_name', 'Unknown')})")
+            else:
+                details.append(unit_code)
+        return details
+
+    if missing_core:
+        messages.append(f"Missing {len(missing_core)} core units: {', '.join(describe(missing_core, 'core'))}")
+    else:
+        messages.append(f"All core units completed ({len(completed_core)}/{len(core_set)})")
+
+    if missing_major:
+        messages.append(f"Missing {len(missing_major)} major units: {', '.join(describe(missing_major, 'major'))}")
+    else:
+        messages.append(f"All major units completed ({len(completed_major)}/{len(major_set)})")
+
+    if missing_elective:
+        messages.append(f"Missing {len(missing_elective)} elective units")
+    else:
+        messages.append(f"All elective requirements completed ({len(completed_elective)}/{len(elective_set)})")
+
+    other_missing = missing_required - missing_core - missing_major - missing_elective
+    if other_missing:
+        messages.append(f"Missing {len(other_missing)} other required units: {', '.join(list(other_missing))}")
+
+    return {
+        "can_graduate": can_graduate,
+        "total_credits": credits,
+        "core_credits": core_credits,
+        "major_credits": major_credits,
+        "core_completed": len(completed_core),
+        "major_completed": len(completed_major),
+        "mpu_requirements_met": True,
+        "mpu_types_completed": [],
+        "missing_core_units": list(missing_core),
+        "missing_major_units": list(missing_major),
+        "messages": messages,
+        "planner_info": f"Planner {planner_id} for {student_course} - {student_major} (Electives handled)",
+    }
+
+
+def apply_outcomes(student_units: List[dict], outcomes: Iterable[dict]) -> List[dict]:
+    """Student units with hypothetical outcomes applied (the input is not modified).
+
+    Each outcome replaces the student's row for the same unit code, or is
+    added as a new row when the student has not taken the unit.
+    """
+    rows = {normalize_code(u.get("unit_code")): u for u in student_units}
+    for outcome in outcomes:
+        code = normalize_code(outcome.get("unit_code"))
+        if not code:
+            continue
+        rows[code] = {**rows.get(code, {}), **outcome, "unit_code": code}
+    return list(rows.values())
+
+
+def progress_student_type(student: dict) -> Tuple[str, bool]:
+    student_type = (student.get("student_type") or "malaysian").strip().lower()
+
+    raw_credit = student.get("has_spm_bm_credit")
+    if raw_credit is None:
+        has_spm_credit = True
+    elif isinstance(raw_credit, bool):
+        has_spm_credit = raw_credit
+    elif isinstance(raw_credit, (int, float)):
+        has_spm_credit = bool(raw_credit)
+    elif isinstance(raw_credit, str):
+        has_spm_credit = raw_credit.strip().lower() in ["true", "1", "yes", "y"]
+    else:
+        has_spm_credit = True
+    return student_type, has_spm_credit
+
+
+def is_passed(grade) -> bool:
+    return str(grade or "").upper() not in ["N", "F", "FAIL", "", "NAN", " ", "N "]
+
+
+def empty_progress(student: dict) -> Dict[str, Any]:
+    return {
+        "student": student,
+        "default_planner_units": [],
+        "student_units": [],
+        "completed_units": [],
+        "remaining_units": [],
+        "summary": {"completed_count": 0, "total_required": 0},
+    }
+
+
+def evaluate_progress(student: dict, planner_units: List[dict], student_units: List[dict]) -> Dict[str, Any]:
+    """Mark each applicable planner row completed/remaining for a student.
+
+    Planner rows are copied, so cached ``planner_units`` are never mutated.
+    ``student_units`` may be a ``transcript_store.Transcript``; the document
+    then carries its rows as dicts.
+    """
+    transcript = _transcript(student_units)
+    if transcript is not None:
+        student_units = transcript.rows()
+    student_type, has_spm_credit = progress_student_type(student)
+    filtered_units = filter_mpu_units((dict(u) for u in planner_units), student_type, has_spm_credit)
+
+    elective_placeholders = [
+        u for u in filtered_units
+        if str(u.get("unit_code")).lower() in ["0", "nan", "", "none", "—"]
+    ]
+
+    student_units_map = {u["unit_code"]: u for u in student_units if u.get("unit_code")}
+    planner_codes = {p.get("unit_code") for p in filtered_units}
+    used_for_elective = set()
+
+    for unit in filtered_units:
+        code = str(unit.get("unit_code"))
+        unit["completed"] = False
+        unit["replacement"] = None
+
+        # Completed if student passed
+        if code in student_units_map and is_passed(student_units_map[code].get("grade")):
+            unit["completed"] = True
+
+        # Fill elective placeholder only with passed extra units
+        elif unit in elective_placeholders:
+            unmatched = next(
+                (
+                    su for su in student_units
+                    if su["unit_code"] not in planner_codes
+                    and su["unit_code"] not in used_for_elective
+                    and su["unit_code"] not in ["AIMFECS"]   # exclude academic integrity module
+                    and is_passed(su.get("grade"))
+                ),
+                None
+            )
+            if unmatched:
+                unit["completed"] = True
+                unit["replacement"] = unmatched["unit_code"]
+                unit["unit_name"] = f"{unit['unit_name']} (filled with {unmatched['unit_code']})"
+                used_for_elective.add(unmatched["unit_code"])
+
+    completed_units = [u for u in filtered_units if u["completed"]]
+    remaining_units = [u for u in filtered_units if not u["completed"]]
+
+    return {
+        "student": student,
+        "default_planner_units": filtered_units,
+        "student_units": student_units,
+        "completed_units": completed_units,
+        "remaining_units": remaining_units,
+        "elective_placeholders": elective_placeholders,
+        "summary": {
+            "completed_count": len(completed_units),
+            "total_required": len(filtered_units),
+        },
+    }
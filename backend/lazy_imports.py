@@ -0,0 +1,27 @@
+"""Deferred imports for heavy optional modules (pandas/openpyxl are only needed by the upload endpoints)."""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """Imports ``name`` on first attribute access instead of at module load."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
@@ -0,0 +1,43 @@
+-- Versioned study planners (run once in the Supabase SQL editor).
+--
+-- study_planners.version is bumped by the backend after every edit batch,
+-- and the planner's rows as they stand afterwards are kept in
+-- study_planner_versions.  Students remember which planner version their
+-- last graduation check used.
+
+alter table study_planners
+    add column if not exists version integer not null default 1;
+
+create table if not exists study_planner_versions (
+    id bigserial primary key,
+    planner_id uuid not null references study_planners (id) on delete cascade,
+    version integer not null,
+    snapshot jsonb not null,
+    created_at timestamptz not null default now(),
+    unique (planner_id, version)
+);
+
+alter table students
+    add column if not exists graduation_planner_id uuid,
+    add column if not exists graduation_planner_version integer;
+
+-- Version 1 of every existing planner, in the same compact shape as
+-- planner_versions.snapshot() writes.
+insert into study_planner_versions (planner_id, version, snapshot)
+select
+    p.id,
+    1,
+    jsonb_build_object(
+        'columns', jsonb_build_array('row_index', 'year', 'semester', 'unit_code', 'unit_name', 'prerequisites', 'unit_type'),
+        'rows', coalesce(
+            jsonb_agg(
+                jsonb_build_array(u.row_index, u.year, u.semester, u.unit_code, u.unit_name, u.prerequisites, u.unit_type)
+                order by u.row_index
+            ) filter (where u.id is not null),
+            '[]'::jsonb
+        )
+    )
+from study_planners p
+left join study_planner_units u on u.planner_id = p.id
+group by p.id
+on conflict (planner_id, version) do nothing;
@@ -0,0 +1 @@
+"""Local performance tooling for the FastAPI backend (stand-in database, data generator, benchmarks)."""
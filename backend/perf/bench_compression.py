@@ -0,0 +1,68 @@
+"""Bytes saved and CPU cost of response compression.
+
+Encodes the synthetic list/progress payloads from ``perf.bench_json`` and
+reports the compressed size and time per encoding and level.  With
+``--app-url`` it instead fetches real endpoints from a running backend
+with and without ``Accept-Encoding`` and reports the transferred bytes::
+
+    python -m perf.bench_compression --rows 10000
+    python -m perf.bench_compression --app-url http://127.0.0.1:8000
+"""
+
+import argparse
+import time
+
+import httpx
+
+import compression
+import fastjson
+from perf.bench_json import progress, students
+
+ENDPOINTS = ("/students", "/units", "/api/units", "/api/programs", "/api/analytics/unit-performance")
+
+
+def local(rows: int, repeat: int) -> None:
+    payloads = {f"students x{rows}": fastjson.dumps(students(rows)), "progress (48 units)": fastjson.dumps(progress(48))}
+    variants = [("gzip", {"gzip_level": level}, f"gzip-{level}") for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        variants += [("br", {"brotli_quality": q}, f"br-{q}") for q in (4, 6, 11)]
+    print(f"{'payload':<22}{'variant':<10}{'raw KB':>10}{'out KB':>10}{'ratio':>8}{'ms':>9}")
+    for label, body in payloads.items():
+        for encoding, options, name in variants:
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                out = compression.compress(body, encoding, **options)
+                best = min(best, time.perf_counter() - started)
+            print(f"{label:<22}{name:<10}{len(body) / 1024:>10.1f}{len(out) / 1024:>10.1f}"
+                  f"{len(body) / len(out):>7.1f}x{best * 1000:>9.2f}")
+
+
+def remote(app_url: str) -> None:
+    print(f"{'endpoint':<36}{'identity KB':>12}{'wire KB':>10}{'encoding':>10}")
+    with httpx.Client(base_url=app_url, timeout=60) as http:
+        for path in ENDPOINTS:
+            plain = http.get(path, headers={"Accept-Encoding": "identity"})
+            packed = http.get(path, headers={"Accept-Encoding": "br, gzip"})
+            packed.raise_for_status()  # do not report the size of an error page
+            # httpx decodes the body; the wire size is the Content-Length header
+            wire = int(packed.headers.get("content-length") or len(packed.content))
+            print(f"{path:<36}{len(plain.content) / 1024:>12.1f}{wire / 1024:>10.1f}"
+                  f"{packed.headers.get('content-encoding', '-'):>10}")
+        print("server counters:", http.get("/api/metrics").json().get("compression"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure response compression savings")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--app-url", help="measure a running backend instead of synthetic payloads")
+    args = parser.parse_args()
+    if args.app_url:
+        remote(args.app_url)
+    else:
+        local(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
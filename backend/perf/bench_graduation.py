@@ -0,0 +1,147 @@
+"""Micro-benchmarks for the graduation and progress evaluation in ``graduation.py``.
+
+Runs entirely in memory on fixed fixtures and compares against the stored
+baseline in ``perf/baselines/graduation.json``::
+
+    python -m perf.bench_graduation                 # compare, exit 1 on regression
+    python -m perf.bench_graduation --save          # record a new baseline
+    python -m perf.bench_graduation --threshold 0.1 # flag anything >10% slower
+
+The threshold can also be set with ``GRADUATION_BENCH_THRESHOLD``.  Baselines
+are machine specific; re-record them when moving to different hardware.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import graduation
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "graduation.json")
+DEFAULT_THRESHOLD = float(os.getenv("GRADUATION_BENCH_THRESHOLD", "0.25"))
+
+
+def planner_rows(cores: int, majors: int, electives: int, mpu: List[str] = ()) -> List[dict]:
+    rows = []
+    for i in range(cores):
+        rows.append({"unit_code": f"COS1{i:04d}", "unit_type": "Core", "unit_name": f"Core {i}"})
+    for i in range(majors):
+        rows.append({"unit_code": f"SWE2{i:04d}", "unit_type": "Major", "unit_name": f"Major {i}"})
+    for _ in range(electives):
+        rows.append({"unit_code": None, "unit_type": "Elective", "unit_name": "Elective"})
+    for code in mpu:
+        rows.append({"unit_code": code, "unit_type": "MPU", "unit_name": code})
+    for index, row in enumerate(rows, start=1):
+        row.update(row_index=index, year=1 + (index - 1) // 8, semester=str(1 + (index - 1) % 2))
+    return rows
+
+
+def transcript(codes: List[str], failed: int = 0) -> List[dict]:
+    units = [{"unit_code": c, "unit_name": c, "grade": "C", "completed": True} for c in codes]
+    for unit in units[:failed]:
+        unit.update(grade="F", completed=False)
+    return units
+
+
+def student(student_type: str = "malaysian", has_spm_bm_credit: bool = True) -> dict:
+    return {"student_course": "Bachelor of Computer Science", "student_major": "Software Development",
+            "intake_year": "2022", "intake_term": "Feb/Mar", "student_type": student_type,
+            "has_spm_bm_credit": has_spm_bm_credit}
+
+
+def fixtures() -> Dict[str, Tuple[dict, List[dict], List[dict]]]:
+    small = planner_rows(4, 2, 2)
+    full = planner_rows(28, 12, 8)
+    electives = planner_rows(8, 4, 12)
+    mpu = planner_rows(20, 8, 4, ["MPU3183", "MPU3213", "MPU3143", "MPU3222", "MPU3412"])
+    codes = lambda rows: [r["unit_code"] for r in rows if r["unit_code"]]
+    extras = [f"TNE3{i:04d}" for i in range(14)]
+    return {
+        "small_planner": (student(), transcript(codes(small)[:5] + extras[:1]), small),
+        "planner_48_units": (student(), transcript(codes(full)[:36] + extras[:6], failed=2), full),
+        "heavy_electives": (student(), transcript(codes(electives) + extras), electives),
+        "mpu_malaysian": (student("malaysian", False), transcript(codes(mpu) + extras[:4]), mpu),
+        "mpu_international": (student("international", False), transcript(codes(mpu) + extras[:4]), mpu),
+    }
+
+
+def measure(fn: Callable[[], Any], rounds: int, min_round_time: float) -> Dict[str, float]:
+    # calibrate so one round lasts at least min_round_time, like pytest-benchmark
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        if time.perf_counter() - started >= min_round_time:
+            break
+        iterations *= 2
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - started) / iterations * 1e6)
+    return {"min_us": round(min(samples), 3), "mean_us": round(statistics.mean(samples), 3),
+            "stddev_us": round(statistics.pstdev(samples), 3), "rounds": rounds, "iterations": iterations}
+
+
+def run(rounds: int, min_round_time: float) -> Dict[str, Dict[str, float]]:
+    results = {}
+    planner = {"id": "bench-planner"}
+    for name, (stu, units, rows) in fixtures().items():
+        results[f"graduation/{name}"] = measure(
+            lambda: graduation.evaluate_graduation(stu, units, planner, rows), rounds, min_round_time)
+        results[f"progress/{name}"] = measure(
+            lambda: graduation.evaluate_progress(stu, rows, units), rounds, min_round_time)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark graduation/progress evaluation")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-round-time", type=float, default=0.05, help="seconds per round")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown vs. baseline that counts as a regression")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    results = run(args.rounds, args.min_round_time)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            baseline = json.load(fh).get("benchmarks", {})
+
+    regressions = []
+    print(f"{'benchmark':<32}{'min us':>10}{'mean us':>10}{'stddev':>9}{'baseline':>10}{'change':>9}")
+    for name, r in results.items():
+        base = baseline.get(name, {}).get("min_us")
+        change = ""
+        if base:
+            ratio = r["min_us"] / base - 1
+            change = f"{ratio:+.0%}"
+            if ratio > args.threshold:
+                regressions.append((name, ratio))
+                change += " !"
+        print(f"{name:<32}{r['min_us']:>10.2f}{r['mean_us']:>10.2f}{r['stddev_us']:>9.2f}"
+              f"{(base or 0):>10.2f}{change:>9}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as fh:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "benchmarks": results}, fh, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: "
+              + ", ".join(f"{n} ({r:+.0%})" for n, r in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Encoding-time benchmark for large list responses.
+
+Compares FastAPI's default path (``jsonable_encoder`` + ``json.dumps``) with
+``fastjson.dumps`` (orjson when installed) and its stdlib fallback on
+synthetic student, unit and progress payloads::
+
+    python -m perf.bench_json --rows 10000
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+
+import fastjson
+
+
+def students(n: int):
+    return [{
+        "student_id": 100_000_000 + i, "student_name": f"Student {i}", "student_email": f"{100_000_000 + i}@students.swinburne.edu.my",
+        "student_course": "Bachelor of Computer Science", "student_major": "Software Development", "intake_term": "Feb/Mar",
+        "intake_year": "2023", "graduation_status": False, "credit_point": 150.0, "student_type": "malaysian",
+        "has_spm_bm_credit": True, "created_at": "2025-02-01T08:00:00.123456+00:00",
+    } for i in range(n)]
+
+
+def progress(n_units: int):
+    rows = [{"id": f"4b8f1c2e-0000-4000-8000-{i:012d}", "planner_id": "4b8f1c2e-0000-4000-8000-000000000000", "row_index": i,
+             "year": 1 + i // 8, "semester": "1", "unit_code": f"COS1{i:04d}", "unit_name": f"Unit {i}",
+             "prerequisites": "COS10009", "unit_type": "Core", "completed": i % 3 != 0, "replacement": None} for i in range(n_units)]
+    return {"student": students(1)[0], "default_planner_units": rows, "student_units": rows,
+            "completed_units": rows[::2], "remaining_units": rows[1::2], "summary": {"completed_count": n_units // 2}}
+
+
+def stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def fastapi_default(content: Any) -> bytes:
+    # what JSONResponse(jsonable_encoder(content)) does for a plain return value
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return min(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON encoding paths")
+    parser.add_argument("--rows", type=int, default=10_000, help="student rows in the list payload")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads: Dict[str, Any] = {
+        f"students x{args.rows}": students(args.rows),
+        "progress (48 units)": progress(48),
+    }
+    encoders = {"jsonable_encoder+json": fastapi_default, "stdlib fallback": stdlib_dumps}
+    if fastjson.orjson is not None:
+        encoders["orjson"] = fastjson.dumps
+    print(f"{'payload':<24}{'KB':>8}" + "".join(f"{name:>24}" for name in encoders))
+    for label, payload in payloads.items():
+        size = len(fastapi_default(payload)) / 1024
+        timings = [best_of(lambda: enc(payload), args.repeat) for enc in encoders.values()]
+        base = timings[0]
+        cells = "".join(f"{t:>14.2f} ms ({base / t:>4.1f}x)" for t in timings)
+        print(f"{label:<24}{size:>8.0f}{cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Cold-start benchmark for the backend.
+
+Each sample runs in a fresh interpreter and measures the ``import main`` time,
+the lifespan startup and the first ``/ping`` response, and which heavy
+modules were loaded along the way::
+
+    python -m perf.bench_startup --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+heavy_after_import = [m for m in ("pandas", "openpyxl", "supabase", "postgrest") if m in sys.modules]
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+ready_started = time.perf_counter()
+with client:
+    ready = time.perf_counter()
+    client.get("/ping")
+    first = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - ready_started) * 1000,
+    "first_request_ms": (first - ready) * 1000,
+    "heavy_after_import": heavy_after_import,
+}))
+"""
+
+
+def sample(env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--supabase-url", default=os.getenv("SUPABASE_URL", "http://127.0.0.1:9"),
+                        help="defaults to a closed local port, so no real project is contacted")
+    args = parser.parse_args()
+
+    env = dict(os.environ, SUPABASE_URL=args.supabase_url, SUPABASE_KEY=os.getenv("SUPABASE_KEY", "local"))
+    samples = [sample(env) for _ in range(args.runs)]
+    for key in ("import_ms", "startup_ms", "first_request_ms"):
+        values = [s[key] for s in samples]
+        print(f"{key:<18} median {statistics.median(values):8.1f}   min {min(values):8.1f}   max {max(values):8.1f}")
+    print("modules loaded by import:", ", ".join(samples[0]["heavy_after_import"]) or "none of pandas/openpyxl/supabase")
+
+
+if __name__ == "__main__":
+    main()
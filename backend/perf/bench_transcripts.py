@@ -0,0 +1,143 @@
+"""Memory and speed of ``student_units`` as lists of dicts vs. ``TranscriptStore``.
+
+Loads every transcript row of a generated dataset (or a synthetic cohort)
+both ways, a page of 1000 rows at a time like ``main.fetch_pages``, and
+reports retained and peak memory (tracemalloc) and the time of the
+per-student graduation helpers over the whole cohort::
+
+    python -m perf.datagen --scale 10k --db perf-data/10k.sqlite
+    python -m perf.bench_transcripts --db perf-data/10k.sqlite
+    python -m perf.bench_transcripts --students 20000      # synthetic, no dataset needed
+
+It also checks that both representations give the same passed codes,
+credits and graduation results.
+"""
+
+import argparse
+import gc
+import random
+import sqlite3
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List
+
+import graduation
+from transcript_store import TranscriptStore
+
+PAGE_SIZE = 1000
+COLUMNS = ("student_id", "unit_code", "unit_name", "grade", "completed")
+GRADE_MIX = ["HD", "D", "C", "C", "P", "P", "P", "N", "F", "PA", None]
+
+
+def db_pages(path: str) -> Iterator[List[dict]]:
+    conn = sqlite3.connect(path)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM student_units ORDER BY id")
+        while True:
+            # fresh dicts per page, like a decoded PostgREST response
+            page = [dict(zip(COLUMNS, (sid, code, name, grade, bool(done))))
+                    for sid, code, name, grade, done in cursor.fetchmany(PAGE_SIZE)]
+            if not page:
+                return
+            yield page
+    finally:
+        conn.close()
+
+
+def synthetic_pages(students: int, units_per_student: int = 24, seed: int = 7) -> Iterator[List[dict]]:
+    rng = random.Random(seed)
+    catalogue = [(f"{prefix}{n:05d}", f"{prefix} unit {n}") for prefix in ("COS", "SWE", "TNE", "ICT", "MPU")
+                 for n in range(10000, 10120)]
+    page: List[dict] = []
+    for i in range(students):
+        for code, name in rng.sample(catalogue, units_per_student):
+            grade = rng.choice(GRADE_MIX)
+            page.append({"student_id": 100_000_000 + i, "unit_code": code, "unit_name": name, "grade": grade,
+                         "completed": grade not in ("N", "F", None)})
+            if len(page) == PAGE_SIZE:
+                yield page
+                page = []
+    if page:
+        yield page
+
+
+def as_dicts(pages: Iterator[List[dict]]) -> Dict[Any, List[dict]]:
+    grouped: Dict[Any, List[dict]] = {}
+    for page in pages:
+        for row in page:
+            grouped.setdefault(row["student_id"], []).append(row)
+    return grouped
+
+
+def as_store(pages: Iterator[List[dict]]) -> TranscriptStore:
+    store = TranscriptStore()
+    for page in pages:
+        store.extend(page)
+    return store
+
+
+def load(build: Callable[[Iterator[List[dict]]], Any], pages: Callable[[], Iterator[List[dict]]]):
+    """(result, retained bytes, peak bytes, seconds) for one load."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(pages())
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak, elapsed
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return min(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare lists of dicts with the compact transcript store")
+    parser.add_argument("--db", help="dataset generated by perf.datagen (default: synthetic rows)")
+    parser.add_argument("--students", type=int, default=10_000, help="synthetic cohort size")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = (lambda: db_pages(args.db)) if args.db else (lambda: synthetic_pages(args.students))
+    dicts, dict_bytes, dict_peak, dict_load = load(as_dicts, pages)
+    store, store_bytes, store_peak, store_load = load(as_store, pages)
+    rows = store.row_count()
+    print(f"{len(store)} students, {rows} transcript rows\n")
+    print(f"{'':<16}{'retained MB':>12}{'peak MB':>10}{'bytes/row':>11}{'load ms':>10}")
+    for label, retained, peak, elapsed in (("list of dicts", dict_bytes, dict_peak, dict_load),
+                                           ("TranscriptStore", store_bytes, store_peak, store_load)):
+        print(f"{label:<16}{retained / 2**20:>12.1f}{peak / 2**20:>10.1f}{retained / max(rows, 1):>11.0f}"
+              f"{1000 * elapsed:>10.0f}")
+    print(f"\nmemory: {dict_bytes / max(store_bytes, 1):.1f}x smaller "
+          f"(store.nbytes() = {store.nbytes() / 2**20:.1f} MB)\n")
+
+    student_ids = list(dicts)
+    student = {"student_course": "Bachelor of Computer Science", "student_major": "Software Development",
+               "student_type": "malaysian", "has_spm_bm_credit": True}
+    planner = {"id": "bench"}
+    planner_units = [{"unit_code": code, "unit_type": "Core" if code.startswith("COS") else "Major", "unit_name": code}
+                     for code in sorted({row["unit_code"] for row in dicts[student_ids[0]]} if student_ids else ())]
+    planner_units += [{"unit_code": None, "unit_type": "Elective", "unit_name": "Elective"}] * 4
+    checks = {
+        "passed_codes": graduation.passed_codes,
+        "total_credits": graduation.total_credits,
+        "evaluate_graduation": lambda units: graduation.evaluate_graduation(student, units, planner, planner_units),
+    }
+    print(f"{'cohort pass':<22}{'dicts ms':>10}{'store ms':>10}")
+    for name, fn in checks.items():
+        for sid in student_ids:
+            if fn(dicts[sid]) != fn(store.get(sid)):
+                raise SystemExit(f"{name} differs for student {sid}")
+        dict_ms = best_of(lambda: [fn(dicts[sid]) for sid in student_ids], args.repeat)
+        store_ms = best_of(lambda: [fn(store.get(sid)) for sid in student_ids], args.repeat)
+        print(f"{name:<22}{dict_ms:>10.1f}{store_ms:>10.1f}  ({dict_ms / store_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Synthetic data generator for the local Supabase stand-in.
+
+Produces programs, majors, intake years, a unit catalogue with prerequisites,
+study planners for every program/major/intake and students with transcripts::
+
+    python -m perf.datagen --scale 10k --db perf-data/10k.sqlite
+
+Generation is deterministic for a given ``--seed``.
+"""
+
+import argparse
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+
+import planner_versions
+from perf.local_supabase import LocalDatabase
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+PROGRAMS = [
+    ("Bachelor of Computer Science", "BA-CS", ["Software Development", "Artificial Intelligence", "Cybersecurity", "Data Science"]),
+    ("Bachelor of Information and Communication Technology", "BA-ICT", ["Network Technology", "Business Information Systems"]),
+    ("Bachelor of Engineering", "BH-ESE1", ["Software Engineering", "Robotics and Mechatronics"]),
+]
+INTAKE_YEARS = [2020, 2021, 2022, 2023, 2024, 2025]
+INTAKE_TERMS = ["Feb/Mar", "Aug/Sep"]
+GRADES = ["HD", "HD", "D", "D", "C", "C", "C", "P", "P", "P", "N", "F"]
+MPU_UNITS = [("MPU3183", "Penghayatan Etika dan Peradaban"), ("MPU3213", "Bahasa Kebangsaan A"),
+             ("MPU3143", "Bahasa Melayu Komunikasi 2"), ("MPU3222", "Entrepreneurship"),
+             ("MPU3412", "Community Service")]
+FIRST_NAMES = ["Aisha", "Wei", "Arjun", "Siti", "Jun", "Daniel", "Mei Ling", "Hafiz", "Priya", "Ethan",
+               "Nurul", "Kai", "Farah", "Ryan", "Chloe", "Amir", "Li Na", "Marcus", "Zara", "Irfan"]
+LAST_NAMES = ["Tan", "Lim", "Abdullah", "Wong", "Kumar", "Lee", "Ng", "Rahman", "Chong", "Ismail",
+              "Teo", "Singh", "Ong", "Ahmad", "Yap", "Goh", "Hassan", "Chan", "Raj", "Ho"]
+
+
+def make_units(rng: random.Random) -> List[Dict[str, Any]]:
+    """Build a catalogue of ~130 units; later-level units depend on earlier ones."""
+    units = []
+    by_level: Dict[int, List[str]] = {1: [], 2: [], 3: []}
+    for prefix in ("COS", "ICT", "SWE", "TNE", "ENG"):
+        for level in (1, 2, 3):
+            for n in range(8):
+                code = f"{prefix}{level}{n:04d}"
+                prereq = None
+                if level > 1 and by_level[level - 1]:
+                    first = rng.choice(by_level[level - 1])
+                    if rng.random() < 0.3:
+                        prereq = f"{first} OR {rng.choice(by_level[level - 1])}"
+                    elif rng.random() < 0.3:
+                        prereq = f"{first} AND {rng.choice(by_level[level - 1])}"
+                    else:
+                        prereq = first
+                units.append({
+                    "unit_code": code,
+                    "unit_name": f"{prefix} Unit {level}.{n}",
+                    "prerequisites": prereq,
+                    "concurrent_prerequisite": None,
+                    "offered_terms": rng.choice(["Semester 1", "Semester 2", "Semester 1, Semester 2"]),
+                    "credit_point": 12.5,
+                })
+                by_level[level].append(code)
+    for code, name in MPU_UNITS:
+        units.append({"unit_code": code, "unit_name": name, "prerequisites": None, "concurrent_prerequisite": None,
+                      "offered_terms": "Semester 1, Semester 2", "credit_point": 12.5})
+    units.append({"unit_code": "ICT20016", "unit_name": "Industry Placement", "prerequisites": None,
+                  "concurrent_prerequisite": None, "offered_terms": "Semester 1, Semester 2", "credit_point": 25})
+    return units
+
+
+def make_planner_units(rng: random.Random, planner_id: str, catalogue: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """A 3-year, 24-row planner: core and major units by level, electives, MPU units."""
+    by_level = {lvl: [u for u in catalogue if len(u["unit_code"]) == 8 and u["unit_code"][3] == str(lvl)]
+                for lvl in (1, 2, 3)}
+    rows = []
+    row_index = 1
+    for year in (1, 2, 3):
+        picks = rng.sample(by_level[year], 6)
+        slots = [(u, "Core" if i < 4 else "Major") for i, u in enumerate(picks)] + [(None, "Elective")] * 1
+        slots.append((dict(zip(("unit_code", "unit_name"), MPU_UNITS[year - 1])), "MPU"))
+        for i, (unit, unit_type) in enumerate(slots):
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "planner_id": planner_id,
+                "row_index": row_index,
+                "year": year,
+                "semester": "1" if i % 2 == 0 else "2",
+                "unit_code": unit["unit_code"] if unit else None,
+                "unit_name": unit["unit_name"] if unit else "Elective",
+                "prerequisites": unit.get("prerequisites") if unit else None,
+                "unit_type": unit_type,
+            })
+            row_index += 1
+    return rows
+
+
+def generate(db: LocalDatabase, students: int, seed: int = 17) -> Dict[str, int]:
+    rng = random.Random(seed)
+    counts: Dict[str, int] = {}
+
+    db.bulk_load("programs", [{"program_name": name, "program_code": code} for name, code, _ in PROGRAMS])
+    program_ids = {r["program_name"]: r["id"] for r in db.select("programs", [{"column": "*", "alias": "*"}], [], None, None, None, {})[0]}
+    db.bulk_load("majors", [{"program_id": program_ids[name], "major_name": m} for name, _, majors in PROGRAMS for m in majors])
+    db.bulk_load("intake_years", [{"intake_year": y} for y in INTAKE_YEARS])
+
+    catalogue = make_units(rng)
+    db.bulk_load("units", catalogue)
+    elective_pool = [u for u in catalogue if u["unit_code"].startswith(("TNE", "ENG"))]
+
+    planners, planner_rows = [], []
+    for name, code, majors in PROGRAMS:
+        for major in majors:
+            for year in INTAKE_YEARS:
+                for term in INTAKE_TERMS:
+                    planner_id = str(uuid.uuid4())
+                    planners.append({"id": planner_id, "program": name, "program_code": code, "major": major,
+                                     "intake_year": year, "intake_semester": term})
+                    planner_rows.append(make_planner_units(rng, planner_id, catalogue))
+    db.bulk_load("study_planners", planners)
+    db.bulk_load("study_planner_units", [row for rows in planner_rows for row in rows])
+    db.bulk_load("study_planner_versions", [
+        {"planner_id": planner["id"], "version": 1, "snapshot": planner_versions.snapshot(rows)}
+        for planner, rows in zip(planners, planner_rows)
+    ])
+
+    student_batch: List[Dict[str, Any]] = []
+    unit_batch: List[Dict[str, Any]] = []
+    total_units = 0
+    for i in range(students):
+        idx = rng.randrange(len(planners))
+        planner, rows = planners[idx], planner_rows[idx]
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        student_id = 100_000_000 + i
+        student_type = "international" if rng.random() < 0.2 else "malaysian"
+        student_batch.append({
+            "student_id": student_id,
+            "student_name": f"{first} {last}",
+            "student_email": f"{student_id}@students.swinburne.edu.my",
+            "student_course": planner["program"],
+            "student_major": planner["major"],
+            "intake_term": planner["intake_semester"],
+            "intake_year": str(planner["intake_year"]),
+            "graduation_status": False,
+            "credit_point": 0.0,
+            "student_type": student_type,
+            "has_spm_bm_credit": rng.random() < 0.7,
+        })
+        # progress through the planner: later intakes have completed fewer rows
+        progress = min(1.0, max(0.0, (2026 - planner["intake_year"]) / 3.0 - rng.random() * 0.3))
+        taken = rows[: int(len(rows) * progress)]
+        for row in taken:
+            code = row["unit_code"] or rng.choice(elective_pool)["unit_code"]
+            grade = rng.choice(GRADES)
+            unit_batch.append({"student_id": student_id, "unit_code": code, "unit_name": row["unit_name"],
+                               "grade": grade, "completed": grade not in ("N", "F")})
+        if len(unit_batch) >= 50_000:
+            db.bulk_load("students", student_batch)
+            db.bulk_load("student_units", unit_batch)
+            total_units += len(unit_batch)
+            student_batch, unit_batch = [], []
+    db.bulk_load("students", student_batch)
+    db.bulk_load("student_units", unit_batch)
+    total_units += len(unit_batch)
+
+    counts.update(students=students, student_units=total_units, units=len(catalogue),
+                  study_planners=len(planners), study_planner_units=sum(len(r) for r in planner_rows))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic data for the local Supabase stand-in")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="1k")
+    parser.add_argument("--db", required=True, help="SQLite file to create")
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    started = time.perf_counter()
+    counts = generate(LocalDatabase(args.db), SCALES[args.scale], args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Generated {args.scale} dataset in {elapsed:.1f}s: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
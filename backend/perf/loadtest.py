@@ -0,0 +1,245 @@
+"""End-to-end load test for the FastAPI backend.
+
+Starts the local Supabase stand-in on a scratch copy of a generated dataset,
+starts ``main:app`` under uvicorn pointed at it, then replays a weighted mix of
+requests and reports p50/p95/p99 latency and throughput per endpoint::
+
+    python -m perf.datagen --scale 10k --db perf-data/10k.sqlite
+    python -m perf.loadtest --db perf-data/10k.sqlite --duration 30 --concurrency 32
+
+Use ``--app-url`` to target an already running backend instead.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (method, weight); paths are produced by the samplers in build_mix()
+MIXES: Dict[str, Dict[str, Tuple[str, int]]] = {
+    # what a normal teaching week looks like: mostly planner and student pages
+    "browse": {
+        "view_study_planner": ("GET", 30),
+        "list_study_planners": ("GET", 10),
+        "get_student": ("GET", 12),
+        "student_progress": ("GET", 15),
+        "list_units": ("GET", 8),
+        "list_students": ("GET", 3),
+        "programs": ("GET", 7),
+        "intake_years": ("GET", 5),
+        "analytics_overview": ("GET", 3),
+        "graduate": ("PUT", 7),
+    },
+    # end of term: advisors running graduation checks and analytics
+    "graduation": {
+        "graduate": ("PUT", 40),
+        "student_progress": ("GET", 30),
+        "get_student": ("GET", 10),
+        "analytics_overview": ("GET", 10),
+        "unit_performance": ("GET", 10),
+    },
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def build_mix(db_path: str, mix: str, rng: random.Random) -> List[Tuple[str, str, Callable[[], str], int]]:
+    """Sample realistic parameters (student ids, intake keys) from the dataset."""
+    conn = sqlite3.connect(db_path)
+    student_ids = [r[0] for r in conn.execute("SELECT student_id FROM students ORDER BY random() LIMIT 5000")]
+    planners = conn.execute("SELECT program, major, intake_year, intake_semester FROM study_planners").fetchall()
+    conn.close()
+    if not student_ids or not planners:
+        raise SystemExit(f"{db_path} has no data; generate it with perf.datagen first")
+
+    # a class opening the same planner page: skew towards a few hot intakes
+    hot_planners = planners[: max(3, len(planners) // 10)]
+
+    def planner_path() -> str:
+        p = rng.choice(hot_planners) if rng.random() < 0.8 else rng.choice(planners)
+        return "/api/view-study-planner?" + httpx.QueryParams(
+            {"program": p[0], "major": p[1], "intake_year": p[2], "intake_semester": p[3]}).__str__()
+
+    paths: Dict[str, Callable[[], str]] = {
+        "view_study_planner": planner_path,
+        "list_study_planners": lambda: "/api/study-planners",
+        "get_student": lambda: f"/students/{rng.choice(student_ids)}",
+        "student_progress": lambda: f"/api/students/{rng.choice(student_ids)}/progress",
+        "list_units": lambda: "/api/units",
+        "list_students": lambda: "/students",
+        "programs": lambda: "/api/programs",
+        "intake_years": lambda: "/api/intake-years",
+        "analytics_overview": lambda: "/api/analytics/overview",
+        "unit_performance": lambda: "/api/analytics/unit-performance",
+        "graduate": lambda: f"/students/{rng.choice(student_ids)}/graduate",
+    }
+    return [(name, method, paths[name], weight) for name, (method, weight) in MIXES[mix].items()]
+
+
+async def run_load(app_url: str, endpoints, duration: float, concurrency: int,
+                   rng: random.Random) -> Tuple[Dict[str, Dict[str, Any]], float]:
+    names = [e[0] for e in endpoints]
+    weights = [e[3] for e in endpoints]
+    by_name = {e[0]: e for e in endpoints}
+    stats: Dict[str, Dict[str, Any]] = {n: {"latencies": [], "errors": 0, "statuses": {}} for n in names}
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            _, method, path_fn, _ = by_name[name]
+            started = time.perf_counter()
+            try:
+                resp = await client.request(method, path_fn())
+                status = resp.status_code
+            except httpx.HTTPError:
+                status = 0
+            elapsed = (time.perf_counter() - started) * 1000
+            entry = stats[name]
+            entry["latencies"].append(elapsed)
+            entry["statuses"][status] = entry["statuses"].get(status, 0) + 1
+            if status == 0 or status >= 500:
+                entry["errors"] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=app_url, timeout=60.0, limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return stats, time.perf_counter() - started
+
+
+def summarise(stats: Dict[str, Dict[str, Any]], elapsed: float) -> List[Dict[str, Any]]:
+    rows = []
+    all_latencies: List[float] = []
+    for name, entry in stats.items():
+        lat = sorted(entry["latencies"])
+        all_latencies.extend(lat)
+        if not lat:
+            continue
+        rows.append({
+            "endpoint": name,
+            "requests": len(lat),
+            "errors": entry["errors"],
+            "rps": round(len(lat) / elapsed, 1),
+            "p50_ms": round(percentile(lat, 50), 1),
+            "p95_ms": round(percentile(lat, 95), 1),
+            "p99_ms": round(percentile(lat, 99), 1),
+            "statuses": entry["statuses"],
+        })
+    all_latencies.sort()
+    rows.append({
+        "endpoint": "TOTAL",
+        "requests": len(all_latencies),
+        "errors": sum(e["errors"] for e in stats.values()),
+        "rps": round(len(all_latencies) / elapsed, 1),
+        "p50_ms": round(percentile(all_latencies, 50), 1),
+        "p95_ms": round(percentile(all_latencies, 95), 1),
+        "p99_ms": round(percentile(all_latencies, 99), 1),
+        "statuses": {},
+    })
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    header = f"{'endpoint':<22}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['endpoint']:<22}{r['requests']:>10}{r['errors']:>8}{r['rps']:>9}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a traffic mix against the backend")
+    parser.add_argument("--db", required=True, help="dataset generated by perf.datagen")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="browse")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the backend")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="artificial stand-in latency")
+    parser.add_argument("--app-url", help="target a running backend instead of starting one")
+    parser.add_argument("--seed", type=int, default=17)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    endpoints = build_mix(args.db, args.mix, rng)
+    procs: List[subprocess.Popen] = []
+    scratch: Optional[str] = None
+    app_url = args.app_url
+    try:
+        if not app_url:
+            # writes (graduation checks) must not touch the generated dataset
+            scratch = tempfile.mkdtemp(prefix="ssps-load-")
+            db_copy = os.path.join(scratch, "data.sqlite")
+            shutil.copy(args.db, db_copy)
+            db_port, app_port = free_port(), free_port()
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "perf.local_supabase", "--db", db_copy, "--port", str(db_port),
+                 "--latency-ms", str(args.db_latency_ms)], cwd=BACKEND_DIR))
+            wait_for(f"http://127.0.0.1:{db_port}/rest/v1/programs")
+            env = dict(os.environ, SUPABASE_URL=f"http://127.0.0.1:{db_port}", SUPABASE_KEY="local")
+            procs.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--workers", str(args.workers),
+                 "--log-level", "warning"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL))
+            app_url = f"http://127.0.0.1:{app_port}"
+            wait_for(app_url + "/ping")
+
+        print(f"Running '{args.mix}' mix for {args.duration:.0f}s at concurrency {args.concurrency} against {app_url}")
+        stats, elapsed = asyncio.run(run_load(app_url, endpoints, args.duration, args.concurrency, rng))
+        rows = summarise(stats, elapsed)
+        print_table(rows)
+        if args.json:
+            with open(args.json, "w") as fh:
+                json.dump({"mix": args.mix, "duration": elapsed, "concurrency": args.concurrency,
+                           "endpoints": rows}, fh, indent=2)
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
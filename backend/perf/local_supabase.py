@@ -0,0 +1,692 @@
+"""SQLite-backed stand-in for the Supabase PostgREST API.
+
+Only the subset of PostgREST used by ``main.py`` is implemented: column
+selection with embedded resources, the usual filter operators, ``order``,
+``limit``/``offset``, ``Prefer`` handling (return, count, resolution) and
+single-object responses.  Like Supabase, reads return at most ``--max-rows``
+rows (default 1000) whatever ``limit`` asks for, so code that forgets to
+page fails here too.  Point the backend at it with::
+
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=local uvicorn main:app
+
+and start the stand-in with::
+
+    python -m perf.local_supabase --db perf-data/10k.sqlite --port 54321
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+# column name -> type; the first entry of "pk" is the primary key
+SCHEMA: Dict[str, Dict[str, Any]] = {
+    "students": {
+        "pk": "student_id",
+        "columns": {
+            "student_id": "int",
+            "student_name": "text",
+            "student_email": "text",
+            "student_course": "text",
+            "student_major": "text",
+            "intake_term": "text",
+            "intake_year": "text",
+            "graduation_status": "bool",
+            "credit_point": "float",
+            "student_type": "text",
+            "has_spm_bm_credit": "bool",
+            "graduation_planner_id": "uuid",
+            "graduation_planner_version": "int",
+            "created_at": "timestamp",
+        },
+        "defaults": {"graduation_status": False, "credit_point": 0.0, "student_type": "malaysian", "has_spm_bm_credit": True},
+        "indexes": [("student_email",)],
+    },
+    "student_units": {
+        "pk": "id",
+        "columns": {
+            "id": "serial",
+            "student_id": "int",
+            "unit_code": "text",
+            "unit_name": "text",
+            "grade": "text",
+            "completed": "bool",
+            "created_at": "timestamp",
+        },
+        "defaults": {"completed": False},
+        "indexes": [("student_id",), ("unit_code",)],
+    },
+    "units": {
+        "pk": "id",
+        "columns": {
+            "id": "serial",
+            "unit_code": "text",
+            "unit_name": "text",
+            "prerequisites": "text",
+            "concurrent_prerequisite": "text",
+            "offered_terms": "text",
+            "credit_point": "float",
+            "created_at": "timestamp",
+        },
+        "defaults": {"credit_point": 12.5},
+        "unique": [("unit_code",)],
+    },
+    "study_planners": {
+        "pk": "id",
+        "columns": {
+            "id": "uuid",
+            "program": "text",
+            "program_code": "text",
+            "major": "text",
+            "intake_year": "int",
+            "intake_semester": "text",
+            "version": "int",
+            "created_at": "timestamp",
+        },
+        "defaults": {"version": 1},
+        "indexes": [("program", "major", "intake_year", "intake_semester")],
+    },
+    "study_planner_versions": {
+        "pk": "id",
+        "columns": {"id": "serial", "planner_id": "uuid", "version": "int", "snapshot": "json", "created_at": "timestamp"},
+        "unique": [("planner_id", "version")],
+    },
+    "study_planner_units": {
+        "pk": "id",
+        "columns": {
+            "id": "uuid",
+            "planner_id": "uuid",
+            "row_index": "int",
+            "year": "int",
+            "semester": "text",
+            "unit_code": "text",
+            "unit_name": "text",
+            "prerequisites": "text",
+            "unit_type": "text",
+            "created_at": "timestamp",
+        },
+        "indexes": [("planner_id",)],
+    },
+    "programs": {
+        "pk": "id",
+        "columns": {"id": "serial", "program_name": "text", "program_code": "text", "created_at": "timestamp"},
+        "unique": [("program_name",)],
+    },
+    "majors": {
+        "pk": "id",
+        "columns": {"id": "serial", "program_id": "int", "major_name": "text", "created_at": "timestamp"},
+        "indexes": [("program_id",)],
+    },
+    "intake_years": {
+        "pk": "id",
+        "columns": {"id": "serial", "intake_year": "int", "created_at": "timestamp"},
+        "unique": [("intake_year",)],
+    },
+}
+
+# (child table, child column, parent table, parent column)
+RELATIONSHIPS: List[Tuple[str, str, str, str]] = [
+    ("study_planner_units", "planner_id", "study_planners", "id"),
+    ("study_planner_versions", "planner_id", "study_planners", "id"),
+    ("student_units", "student_id", "students", "student_id"),
+    ("majors", "program_id", "programs", "id"),
+]
+
+SQL_TYPES = {"int": "INTEGER", "serial": "INTEGER", "float": "REAL", "bool": "INTEGER",
+             "text": "TEXT", "uuid": "TEXT", "timestamp": "TEXT", "json": "TEXT"}
+
+OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=",
+             "like": "LIKE", "ilike": "LIKE"}
+
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, code: str, message: str, details: Optional[str] = None, hint: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": details, "hint": hint}
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def coerce(table: str, column: str, value: Any) -> Any:
+    """Convert a JSON or query-string value to the storage type of ``column``."""
+    if value is None:
+        return None
+    kind = SCHEMA[table]["columns"][column]
+    try:
+        if kind in ("int", "serial"):
+            if isinstance(value, bool):
+                return int(value)
+            return int(float(value)) if isinstance(value, str) and "." in value else int(value)
+        if kind == "float":
+            return float(value)
+        if kind == "bool":
+            if isinstance(value, str):
+                return 1 if value.strip().lower() in ("true", "t", "1", "yes") else 0
+            return 1 if value else 0
+        if kind == "timestamp" and isinstance(value, str) and value.strip().lower() in ("now", "now()"):
+            return now_iso()
+        if kind == "json":
+            return json.dumps(value)
+    except (TypeError, ValueError):
+        raise PostgrestError(400, "22P02", f'invalid input syntax for type {kind}: "{value}"')
+    return str(value) if kind in ("text", "uuid", "timestamp") else value
+
+
+def decode_row(table: str, row: sqlite3.Row, columns: List[str]) -> Dict[str, Any]:
+    types = SCHEMA[table]["columns"]
+    out = {}
+    for col in columns:
+        value = row[col]
+        if value is not None and types[col] == "bool":
+            value = bool(value)
+        elif value is not None and types[col] == "json":
+            value = json.loads(value)
+        out[col] = value
+    return out
+
+
+def split_top_level(text: str, sep: str = ",") -> List[str]:
+    """Split on ``sep`` ignoring separators nested in parentheses or quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def parse_select(text: str) -> List[Dict[str, Any]]:
+    """Parse a PostgREST ``select`` expression into column and embed items."""
+    items = []
+    for part in split_top_level(text or "*"):
+        alias = None
+        match = re.match(r"^([A-Za-z_][\w]*):(.+)$", part)
+        if match and "(" not in match.group(1):
+            alias, part = match.group(1), match.group(2)
+        if "(" in part and part.endswith(")"):
+            head, inner = part[:-1].split("(", 1)
+            name, _, hint = head.partition("!")
+            items.append({"embed": name.strip(), "alias": alias or name.strip(),
+                          "inner": hint.strip() == "inner", "select": parse_select(inner)})
+        else:
+            name = part.split("::", 1)[0].strip()
+            items.append({"column": name, "alias": alias or name})
+    return items
+
+
+class LocalDatabase:
+    """A thread-safe SQLite database laid out like the production Supabase schema."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.create_schema()
+
+    def create_schema(self) -> None:
+        with self.lock:
+            for table, spec in SCHEMA.items():
+                cols = []
+                for col, kind in spec["columns"].items():
+                    decl = f'"{col}" {SQL_TYPES[kind]}'
+                    if col == spec["pk"]:
+                        decl += " PRIMARY KEY" + (" AUTOINCREMENT" if kind == "serial" else "")
+                    cols.append(decl)
+                self.conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(cols)})')
+                # databases generated before a column was added to SCHEMA
+                existing = {row[1] for row in self.conn.execute(f'PRAGMA table_info("{table}")')}
+                for col, kind in spec["columns"].items():
+                    if col not in existing:
+                        self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{col}" {SQL_TYPES[kind]}')
+                        if col in spec.get("defaults", {}):
+                            self.conn.execute(f'UPDATE "{table}" SET "{col}" = ?',
+                                              [coerce(table, col, spec["defaults"][col])])
+                for index in spec.get("indexes", []):
+                    name = f"idx_{table}_{'_'.join(index)}"
+                    self.conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({", ".join(index)})')
+                for index in spec.get("unique", []):
+                    name = f"uq_{table}_{'_'.join(index)}"
+                    self.conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{name}" ON "{table}" ({", ".join(index)})')
+
+    # ----- helpers -----
+    def check_table(self, table: str) -> Dict[str, Any]:
+        if table not in SCHEMA:
+            raise PostgrestError(404, "42P01", f'relation "public.{table}" does not exist')
+        return SCHEMA[table]
+
+    def check_column(self, table: str, column: str) -> None:
+        if column not in SCHEMA[table]["columns"]:
+            raise PostgrestError(400, "42703", f"column {table}.{column} does not exist")
+
+    def prepare_row(self, table: str, row: Dict[str, Any], columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        spec = SCHEMA[table]
+        if columns:
+            row = {c: row.get(c) for c in columns}
+        for key in row:
+            if key not in spec["columns"]:
+                raise PostgrestError(400, "PGRST204", f"Could not find the '{key}' column of '{table}' in the schema cache")
+        prepared = {}
+        for col, kind in spec["columns"].items():
+            if col in row and row[col] is not None:
+                prepared[col] = coerce(table, col, row[col])
+            elif col in row:
+                prepared[col] = None
+            elif kind == "uuid" and col == spec["pk"]:
+                prepared[col] = str(uuid.uuid4())
+            elif kind == "timestamp" and col == "created_at":
+                prepared[col] = now_iso()
+            elif col in spec.get("defaults", {}):
+                prepared[col] = coerce(table, col, spec["defaults"][col])
+        return prepared
+
+    def where_clause(self, table: str, filters: List[Tuple[str, str]]) -> Tuple[str, List[Any]]:
+        clauses, args = [], []
+        for column, expr in filters:
+            if column in ("or", "and"):
+                sub, sub_args = self.logic_clause(table, column, expr)
+                clauses.append(sub)
+                args.extend(sub_args)
+                continue
+            self.check_column(table, column)
+            sql, sql_args = self.filter_clause(table, column, expr)
+            clauses.append(sql)
+            args.extend(sql_args)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def logic_clause(self, table: str, op: str, expr: str) -> Tuple[str, List[Any]]:
+        inner = expr.strip()
+        if inner.startswith("(") and inner.endswith(")"):
+            inner = inner[1:-1]
+        parts, args = [], []
+        for cond in split_top_level(inner):
+            column, _, rest = cond.partition(".")
+            self.check_column(table, column)
+            sql, sql_args = self.filter_clause(table, column, rest)
+            parts.append(sql)
+            args.extend(sql_args)
+        joiner = " OR " if op == "or" else " AND "
+        return "(" + joiner.join(parts) + ")", args
+
+    def filter_clause(self, table: str, column: str, expr: str) -> Tuple[str, List[Any]]:
+        negate = False
+        if expr.startswith("not."):
+            negate, expr = True, expr[4:]
+        op, _, raw = expr.partition(".")
+        col = f'"{column}"'
+        if op in ("eq", "neq", "gt", "gte", "lt", "lte"):
+            sql, args = f"{col} {OPERATORS[op]} ?", [coerce(table, column, unquote(raw))]
+        elif op in ("like", "ilike"):
+            pattern = unquote(raw).replace("*", "%")
+            sql = f"{col} LIKE ?" if op == "ilike" else f"{col} GLOB ?"
+            if op == "like":
+                pattern = pattern.replace("%", "*").replace("_", "?")
+            args = [pattern]
+        elif op == "is":
+            value = raw.lower()
+            if value == "null":
+                sql, args = f"{col} IS NULL", []
+            elif value in ("true", "false"):
+                sql, args = f"{col} = ?", [1 if value == "true" else 0]
+            else:
+                raise PostgrestError(400, "PGRST100", f"failed to parse filter (is.{raw})")
+        elif op == "in":
+            values = [coerce(table, column, unquote(v)) for v in split_top_level(raw.strip()[1:-1])]
+            if not values:
+                sql, args = "0", []
+            else:
+                sql, args = f"{col} IN ({', '.join('?' for _ in values)})", values
+        else:
+            raise PostgrestError(400, "PGRST100", f"unsupported operator '{op}'")
+        return (f"NOT ({sql})" if negate else sql), args
+
+    def order_clause(self, table: str, order: Optional[str]) -> str:
+        if not order:
+            return ""
+        terms = []
+        for term in order.split(","):
+            pieces = term.split(".")
+            column = pieces[0]
+            self.check_column(table, column)
+            direction = "DESC" if "desc" in pieces[1:] else "ASC"
+            nulls = ""
+            if "nullsfirst" in pieces[1:]:
+                nulls = " NULLS FIRST"
+            elif "nullslast" in pieces[1:]:
+                nulls = " NULLS LAST"
+            terms.append(f'"{column}" {direction}{nulls}')
+        return " ORDER BY " + ", ".join(terms)
+
+    def relationship(self, table: str, other: str) -> Tuple[str, str, bool]:
+        """Return (local column, remote column, many) for an embed of ``other`` from ``table``."""
+        for child, child_col, parent, parent_col in RELATIONSHIPS:
+            if parent == table and child == other:
+                return parent_col, child_col, True
+            if child == table and parent == other:
+                return child_col, parent_col, False
+        raise PostgrestError(400, "PGRST200", f"Could not find a relationship between '{table}' and '{other}' in the schema cache")
+
+    # ----- operations -----
+    def select(self, table: str, items: List[Dict[str, Any]], filters: List[Tuple[str, str]],
+               order: Optional[str], limit: Optional[int], offset: Optional[int],
+               embed_params: Dict[str, Dict[str, Any]], want_count: bool = False) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        self.check_table(table)
+        where, args = self.where_clause(table, filters)
+        sql = f'SELECT * FROM "{table}"{where}{self.order_clause(table, order)}'
+        if limit is not None or offset:
+            sql += f" LIMIT {int(limit) if limit is not None else -1} OFFSET {int(offset or 0)}"
+        with self.lock:
+            rows = self.conn.execute(sql, args).fetchall()
+            total = None
+            if want_count:
+                total = self.conn.execute(f'SELECT COUNT(*) FROM "{table}"{where}', args).fetchone()[0]
+            result = self.shape(table, rows, items, embed_params)
+        return result, total
+
+    def shape(self, table: str, rows: List[sqlite3.Row], items: List[Dict[str, Any]],
+              embed_params: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        all_columns = list(SCHEMA[table]["columns"])
+        plain: List[Tuple[str, str]] = []
+        embeds = []
+        for item in items:
+            if "embed" in item:
+                embeds.append(item)
+            elif item["column"] == "*":
+                plain.extend((c, c) for c in all_columns)
+            else:
+                self.check_column(table, item["column"])
+                plain.append((item["column"], item["alias"]))
+        shaped = []
+        for row in rows:
+            decoded = decode_row(table, row, all_columns)
+            shaped.append({alias: decoded[col] for col, alias in plain})
+        for embed in embeds:
+            other = embed["embed"]
+            self.check_table(other)
+            local_col, remote_col, many = self.relationship(table, other)
+            keys = list({row[local_col] for row in rows if row[local_col] is not None})
+            params = embed_params.get(other, {})
+            filters = list(params.get("filters", [])) + [(remote_col, "in.(" + ",".join(
+                '"' + str(k).replace('"', '\\"') + '"' for k in keys) + ")")]
+            where, args = self.where_clause(other, filters)
+            child_rows = self.conn.execute(
+                f'SELECT * FROM "{other}"{where}{self.order_clause(other, params.get("order"))}', args
+            ).fetchall()
+            children = self.shape(other, child_rows, embed["select"], {})
+            grouped: Dict[Any, List[Dict[str, Any]]] = {}
+            for raw, child in zip(child_rows, children):
+                grouped.setdefault(raw[remote_col], []).append(child)
+            limit = params.get("limit")
+            for raw, out in zip(rows, shaped):
+                matches = grouped.get(raw[local_col], [])
+                if limit is not None:
+                    matches = matches[:limit]
+                out[embed["alias"]] = matches if many else (matches[0] if matches else None)
+            if embed["inner"]:
+                keep = [i for i, out in enumerate(shaped) if out[embed["alias"]]]
+                shaped = [shaped[i] for i in keep]
+                rows = [rows[i] for i in keep]
+        return shaped
+
+    def insert(self, table: str, payload: Any, columns: Optional[List[str]], upsert: bool,
+               ignore_duplicates: bool, on_conflict: Optional[List[str]]) -> List[Dict[str, Any]]:
+        spec = self.check_table(table)
+        rows = payload if isinstance(payload, list) else [payload]
+        conflict = on_conflict or [spec["pk"]]
+        pks = []
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                for raw in rows:
+                    row = self.prepare_row(table, raw, columns)
+                    existing = None
+                    if upsert and all(row.get(c) is not None for c in conflict):
+                        where = " AND ".join(f'"{c}" = ?' for c in conflict)
+                        existing = self.conn.execute(
+                            f'SELECT "{spec["pk"]}" FROM "{table}" WHERE {where}', [row[c] for c in conflict]
+                        ).fetchone()
+                    if existing is not None:
+                        if ignore_duplicates:
+                            continue
+                        updates = {k: v for k, v in row.items() if k in raw or (columns and k in columns)}
+                        updates.pop(spec["pk"], None)
+                        if updates:
+                            sets = ", ".join(f'"{k}" = ?' for k in updates)
+                            self.conn.execute(f'UPDATE "{table}" SET {sets} WHERE "{spec["pk"]}" = ?',
+                                              list(updates.values()) + [existing[0]])
+                        pks.append(existing[0])
+                        continue
+                    cols = list(row)
+                    cursor = self.conn.execute(
+                        f'INSERT INTO "{table}" ({", ".join(chr(34) + c + chr(34) for c in cols)}) '
+                        f'VALUES ({", ".join("?" for _ in cols)})', [row[c] for c in cols])
+                    pks.append(row.get(spec["pk"]) if row.get(spec["pk"]) is not None else cursor.lastrowid)
+                self.conn.execute("COMMIT")
+            except sqlite3.IntegrityError as e:
+                self.conn.execute("ROLLBACK")
+                raise PostgrestError(409, "23505", f"duplicate key value violates unique constraint: {e}")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.fetch_by_pk(table, pks)
+
+    def fetch_by_pk(self, table: str, pks: List[Any]) -> List[Dict[str, Any]]:
+        pk = SCHEMA[table]["pk"]
+        out = []
+        columns = list(SCHEMA[table]["columns"])
+        for start in range(0, len(pks), 500):
+            chunk = pks[start:start + 500]
+            rows = self.conn.execute(
+                f'SELECT * FROM "{table}" WHERE "{pk}" IN ({", ".join("?" for _ in chunk)})', chunk
+            ).fetchall()
+            by_pk = {row[pk]: decode_row(table, row, columns) for row in rows}
+            out.extend(by_pk[k] for k in chunk if k in by_pk)
+        return out
+
+    def update(self, table: str, payload: Dict[str, Any], filters: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        spec = self.check_table(table)
+        if not isinstance(payload, dict):
+            raise PostgrestError(400, "PGRST102", "Update payload must be a JSON object")
+        for key in payload:
+            self.check_column(table, key)
+        updates = {k: coerce(table, k, v) for k, v in payload.items()}
+        where, args = self.where_clause(table, filters)
+        with self.lock:
+            pks = [r[0] for r in self.conn.execute(f'SELECT "{spec["pk"]}" FROM "{table}"{where}', args)]
+            if pks and updates:
+                sets = ", ".join(f'"{k}" = ?' for k in updates)
+                try:
+                    self.conn.execute(f'UPDATE "{table}" SET {sets}{where}', list(updates.values()) + args)
+                except sqlite3.IntegrityError as e:
+                    raise PostgrestError(409, "23505", f"duplicate key value violates unique constraint: {e}")
+            if spec["pk"] in updates:
+                pks = [updates[spec["pk"]] for _ in pks]
+            return self.fetch_by_pk(table, pks)
+
+    def delete(self, table: str, filters: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        spec = self.check_table(table)
+        where, args = self.where_clause(table, filters)
+        with self.lock:
+            rows = self.conn.execute(f'SELECT * FROM "{table}"{where}', args).fetchall()
+            self.conn.execute(f'DELETE FROM "{table}"{where}', args)
+            columns = list(spec["columns"])
+            return [decode_row(table, row, columns) for row in rows]
+
+    def bulk_load(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        """Fast path used by the data generator; bypasses PostgREST semantics."""
+        if not rows:
+            return
+        prepared = [self.prepare_row(table, r) for r in rows]
+        cols = list(prepared[0])
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                f'INSERT INTO "{table}" ({", ".join(chr(34) + c + chr(34) for c in cols)}) '
+                f'VALUES ({", ".join("?" for _ in cols)})', [[r.get(c) for c in cols] for r in prepared])
+            self.conn.execute("COMMIT")
+
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "columns", "on_conflict"}
+
+
+def parse_query(params: List[Tuple[str, str]]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"filters": [], "embeds": {}}
+    for key, value in params:
+        target = query
+        name = key
+        if "." in key and key.split(".", 1)[0] not in ("or", "and"):
+            embed, name = key.rsplit(".", 1)
+            target = query["embeds"].setdefault(embed, {"filters": []})
+        if name == "select" and target is query:
+            query["select"] = value
+        elif name == "order":
+            target["order"] = value
+        elif name == "limit":
+            target["limit"] = int(value)
+        elif name == "offset":
+            target["offset"] = int(value)
+        elif name == "columns" and target is query:
+            query["columns"] = [c.strip().strip('"') for c in value.split(",")]
+        elif name == "on_conflict" and target is query:
+            query["on_conflict"] = [c.strip() for c in value.split(",")]
+        else:
+            target["filters"].append((name, value))
+    return query
+
+
+def parse_prefer(request: Request) -> Dict[str, str]:
+    prefer = {}
+    for header in request.headers.getlist("prefer"):
+        for part in header.split(","):
+            key, _, value = part.strip().partition("=")
+            if key:
+                prefer[key] = value
+    return prefer
+
+
+def create_app(db: LocalDatabase, latency_ms: float = 0.0, max_rows: Optional[int] = 1000) -> FastAPI:
+    app = FastAPI(title="Local Supabase stand-in")
+    app.state.db = db
+    app.state.latency = latency_ms / 1000.0
+    app.state.max_rows = max_rows or None
+
+    @app.exception_handler(PostgrestError)
+    async def postgrest_error(request: Request, exc: PostgrestError):
+        return JSONResponse(status_code=exc.status, content=exc.body)
+
+    def respond(request: Request, rows: List[Dict[str, Any]], status: int, prefer: Dict[str, str],
+                total: Optional[int] = None, offset: int = 0) -> Response:
+        headers = {"Content-Range": f"{offset}-{offset + len(rows) - 1 if rows else '*'}/{total if total is not None else '*'}"}
+        if prefer.get("return") == "minimal" and request.method != "GET":
+            return Response(status_code=204 if status == 200 else status, headers=headers)
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(rows) != 1:
+                raise PostgrestError(406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                                     f"The result contains {len(rows)} rows")
+            return JSONResponse(rows[0], status_code=status, headers=headers)
+        return JSONResponse(rows, status_code=status, headers=headers)
+
+    async def pause():
+        if app.state.latency:
+            await asyncio.sleep(app.state.latency)
+
+    @app.get("/rest/v1/{table}")
+    async def read(table: str, request: Request):
+        await pause()
+        query = parse_query(list(request.query_params.multi_items()))
+        prefer = parse_prefer(request)
+        limit, max_rows = query.get("limit"), app.state.max_rows
+        if max_rows is not None:
+            limit = max_rows if limit is None else min(limit, max_rows)  # PostgREST db-max-rows
+        rows, total = db.select(table, parse_select(query.get("select", "*")), query["filters"],
+                                query.get("order"), limit, query.get("offset"),
+                                query["embeds"], want_count="count" in prefer)
+        return respond(request, rows, 200, prefer, total, query.get("offset") or 0)
+
+    @app.head("/rest/v1/{table}")
+    async def head(table: str, request: Request):
+        response = await read(table, request)
+        return Response(status_code=response.status_code, headers={"Content-Range": response.headers["Content-Range"]})
+
+    @app.post("/rest/v1/{table}")
+    async def create(table: str, request: Request):
+        await pause()
+        query = parse_query(list(request.query_params.multi_items()))
+        prefer = parse_prefer(request)
+        payload = json.loads(await request.body() or b"null")
+        if payload is None:
+            raise PostgrestError(400, "PGRST102", "Empty or invalid json")
+        resolution = prefer.get("resolution", "")
+        rows = db.insert(table, payload, query.get("columns"), upsert=bool(resolution),
+                         ignore_duplicates=resolution == "ignore-duplicates", on_conflict=query.get("on_conflict"))
+        if query.get("select"):
+            items = parse_select(query["select"])
+            pk = SCHEMA[table]["pk"]
+            rows, _ = db.select(table, items, [(pk, "in.(" + ",".join(f'"{r[pk]}"' for r in rows) + ")")],
+                                None, None, None, query["embeds"])
+        return respond(request, rows, 201, prefer)
+
+    @app.patch("/rest/v1/{table}")
+    async def modify(table: str, request: Request):
+        await pause()
+        query = parse_query(list(request.query_params.multi_items()))
+        payload = json.loads(await request.body() or b"{}")
+        rows = db.update(table, payload, query["filters"])
+        return respond(request, rows, 200, parse_prefer(request))
+
+    @app.delete("/rest/v1/{table}")
+    async def remove(table: str, request: Request):
+        await pause()
+        query = parse_query(list(request.query_params.multi_items()))
+        rows = db.delete(table, query["filters"])
+        return respond(request, rows, 200, parse_prefer(request))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local Supabase stand-in")
+    parser.add_argument("--db", default=os.getenv("LOCAL_SUPABASE_DB", ":memory:"), help="SQLite file (default: in-memory)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="artificial per-request latency, to mimic a remote database")
+    parser.add_argument("--max-rows", type=int, default=1000, help="rows per response at most, like Supabase (0: no cap)")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(LocalDatabase(args.db), args.latency_ms, args.max_rows), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Cross-worker cache coherence check.
+
+Starts the local Supabase stand-in on a scratch copy of a generated dataset
+and ``main:app`` under uvicorn with several workers, then repeatedly writes
+through one request and reads through many others, each on a fresh
+connection so the kernel spreads them over the workers.  For every write it
+reports how long stale answers kept coming back::
+
+    python -m perf.datagen --scale 1k --db perf-data/1k.sqlite
+    python -m perf.multiworker_harness --db perf-data/1k.sqlite --workers 4
+    python -m perf.multiworker_harness --db perf-data/1k.sqlite --workers 4 --no-bus   # for comparison
+
+Two scenarios run in turn:
+
+    planner   rename a planner unit, read /api/view-study-planner (cached per worker)
+    student   rename a student, search for the new name (per-worker search index)
+
+With the cache bus each write should be visible on every worker within
+about ``CACHE_BUS_INTERVAL``; with ``--no-bus`` workers that did not handle
+the write keep serving the old value until their cache TTL runs out.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from perf.loadtest import BACKEND_DIR, free_port, percentile, wait_for
+
+FRESH = httpx.Limits(max_keepalive_connections=0)  # one connection per request
+
+
+async def workers_seen(client: httpx.AsyncClient, app_url: str, requests: int) -> Dict[str, dict]:
+    """Cache-bus stats per worker, from whichever workers answered ``requests`` metrics calls."""
+    seen: Dict[str, dict] = {}
+    for _ in range(requests):
+        info = (await client.get(app_url + "/api/metrics")).json().get("cache_bus", {})
+        seen[info.get("worker", "?")] = info
+    return seen
+
+
+async def measure(client: httpx.AsyncClient, write: Callable[[str], Awaitable[None]],
+                  read: Callable[[], Awaitable[Optional[str]]], timeout: float, settle: int,
+                  parallel: int) -> Dict[str, float]:
+    """Write a new marker, then read until ``settle`` reads in a row return it (or ``timeout``)."""
+    marker = "mw-" + uuid.uuid4().hex[:10]
+    await write(marker)
+    started = time.perf_counter()
+    last_stale, reads, stale, in_a_row = None, 0, 0, 0
+    while time.perf_counter() - started < timeout and in_a_row < settle:
+        values = await asyncio.gather(*(read() for _ in range(parallel)))
+        now = time.perf_counter() - started
+        for value in values:
+            reads += 1
+            if value == marker:
+                in_a_row += 1
+            else:
+                stale += 1
+                in_a_row = 0
+                last_stale = now
+    return {
+        "reads": reads,
+        "stale_reads": stale,
+        "consistent_after_ms": round(1000 * (last_stale or 0.0), 1),
+        "converged": in_a_row >= settle,
+    }
+
+
+async def run(app_url: str, db_path: str, rounds: int, timeout: float, parallel: int, workers: int) -> Dict[str, List[dict]]:
+    conn = sqlite3.connect(db_path)
+    planner_id, program, major, intake_year, intake_semester = conn.execute(
+        "SELECT id, program, major, intake_year, intake_semester FROM study_planners ORDER BY id LIMIT 1").fetchone()
+    unit_id, year, semester = conn.execute(
+        "SELECT id, year, semester FROM study_planner_units WHERE planner_id = ? ORDER BY row_index LIMIT 1",
+        (planner_id,)).fetchone()
+    student = conn.execute(
+        "SELECT student_id, student_email, student_course, student_major, intake_term, intake_year, credit_point,"
+        " graduation_status, student_type, has_spm_bm_credit FROM students ORDER BY student_id LIMIT 1").fetchone()
+    conn.close()
+    view_params = {"program": program, "major": major, "intake_year": intake_year, "intake_semester": intake_semester}
+    settle = 4 * workers
+
+    async with httpx.AsyncClient(limits=FRESH, timeout=30) as client:
+        async def write_unit(marker: str) -> None:
+            r = await client.put(app_url + "/api/update-study-planner-unit", json={
+                "unit_id": unit_id, "year": year, "semester": semester, "unit_code": "", "unit_type": "Elective",
+                "unit_name": marker})
+            r.raise_for_status()
+
+        async def read_unit() -> Optional[str]:
+            body = (await client.get(app_url + "/api/view-study-planner", params=view_params)).json()
+            return next((u.get("unit_name") for u in body.get("units", []) if u.get("id") == unit_id), None)
+
+        student_marker = [""]
+
+        async def write_student(marker: str) -> None:
+            (student_id, email, course, major_, term, year_, credits, graduated, kind, bm) = student
+            student_marker[0] = marker
+            r = await client.put(f"{app_url}/students/{student_id}", json={
+                "student_id": student_id, "student_name": marker, "student_email": email,
+                "student_course": course, "student_major": major_, "intake_term": term, "intake_year": str(year_),
+                "credit_point": credits or 0, "graduation_status": bool(graduated),
+                "student_type": kind or "malaysian", "has_spm_bm_credit": True if bm is None else bool(bm)})
+            r.raise_for_status()
+
+        async def read_student() -> Optional[str]:
+            marker = student_marker[0]
+            rows = (await client.get(app_url + "/students/search", params={"q": marker, "limit": 5})).json()
+            return marker if any(r.get("student_id") == student[0] for r in rows) else None
+
+        # every worker builds its own copy of the cached planner view and search index
+        for _ in range(10 * workers):
+            await read_unit()
+        seen = await workers_seen(client, app_url, 10 * workers)
+        print(f"{len(seen)} of {workers} workers answered; cache bus "
+              f"{'on' if all(w.get('enabled') for w in seen.values()) else 'off'}")
+
+        results: Dict[str, List[dict]] = {"planner": [], "student": []}
+        for i in range(rounds):
+            results["planner"].append(await measure(client, write_unit, read_unit, timeout, settle, parallel))
+            results["student"].append(await measure(client, write_student, read_student, timeout, settle, parallel))
+            print(f"round {i + 1}: planner {results['planner'][-1]}  student {results['student'][-1]}")
+        return results
+
+
+def report(results: Dict[str, List[dict]]) -> None:
+    print(f"\n{'scenario':<10} {'converged':>10} {'stale reads':>12} {'p50 ms':>8} {'max ms':>8}")
+    for name, rounds in results.items():
+        delays = sorted(r["consistent_after_ms"] for r in rounds)
+        print(f"{name:<10} {sum(r['converged'] for r in rounds):>6}/{len(rounds):<3} "
+              f"{sum(r['stale_reads'] for r in rounds):>12} {percentile(delays, 50):>8.1f} {delays[-1] if delays else 0:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that writes on one worker reach every worker's caches")
+    parser.add_argument("--db", required=True, help="dataset generated by perf.datagen")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for a write to converge")
+    parser.add_argument("--parallel", type=int, default=8, help="concurrent reads per probe")
+    parser.add_argument("--interval", type=float, help="CACHE_BUS_INTERVAL for the workers")
+    parser.add_argument("--no-bus", action="store_true", help="run the workers with CACHE_BUS=off")
+    args = parser.parse_args()
+
+    procs: List[subprocess.Popen] = []
+    scratch = tempfile.mkdtemp(prefix="ssps-mw-")
+    try:
+        db_copy = os.path.join(scratch, "data.sqlite")
+        shutil.copy(args.db, db_copy)
+        db_port, app_port = free_port(), free_port()
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "perf.local_supabase", "--db", db_copy, "--port", str(db_port)], cwd=BACKEND_DIR))
+        wait_for(f"http://127.0.0.1:{db_port}/rest/v1/programs")
+        env = dict(os.environ, SUPABASE_URL=f"http://127.0.0.1:{db_port}", SUPABASE_KEY="local",
+                   CACHE_BUS_DB=os.path.join(scratch, "cache-bus.sqlite"), CACHE_BUS="off" if args.no_bus else "on",
+                   UPLOAD_CACHE_DB=os.path.join(scratch, "upload-cache.sqlite"),
+                   ANALYTICS_SNAPSHOT_DIR=os.path.join(scratch, "analytics-snapshot"))
+        if args.interval is not None:
+            env["CACHE_BUS_INTERVAL"] = str(args.interval)
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--workers", str(args.workers),
+             "--log-level", "warning"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL))
+        app_url = f"http://127.0.0.1:{app_port}"
+        wait_for(app_url + "/ping")
+        time.sleep(1.0)  # let every worker finish its startup (search index)
+
+        results = asyncio.run(run(app_url, db_copy, args.rounds, args.timeout, args.parallel, args.workers))
+        report(results)
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
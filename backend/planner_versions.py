@@ -0,0 +1,42 @@
+"""Immutable, versioned snapshots of study planners.
+
+Every edit batch on a planner's rows bumps ``study_planners.version`` and
+stores the rows as they stand afterwards in ``study_planner_versions``
+(see ``migrations/001_planner_versions.sql``).  A snapshot is compact:
+the column names once, then one list of values per row, ordered by
+``row_index``::
+
+    {"columns": ["row_index", "year", ...], "rows": [[1, 1, ...], ...]}
+
+Because a version never changes once written, anything derived from a
+planner's rows can be cached under ``(planner_id, version)`` and goes
+stale by version comparison alone, and a graduation decision that stored
+its planner version can be re-checked against exactly the rows it saw.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+COLUMNS = ["row_index", "year", "semester", "unit_code", "unit_name", "prerequisites", "unit_type"]
+
+
+def _row_order(row: dict):
+    index = row.get("row_index")
+    return (index is None, index if index is not None else 0)
+
+
+def snapshot(planner_units: Iterable[dict]) -> Dict[str, Any]:
+    """Compact snapshot of a planner's rows, in row_index order."""
+    rows = sorted(planner_units, key=_row_order)
+    return {"columns": list(COLUMNS), "rows": [[row.get(c) for c in COLUMNS] for row in rows]}
+
+
+def expand(data: Dict[str, Any], planner_id: Optional[str] = None) -> List[dict]:
+    """Planner rows of a snapshot, shaped like ``study_planner_units`` rows."""
+    columns = data.get("columns") or COLUMNS
+    rows = []
+    for values in data.get("rows") or []:
+        row = dict(zip(columns, values))
+        if planner_id is not None:
+            row["planner_id"] = planner_id
+        rows.append(row)
+    return rows
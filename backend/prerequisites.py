@@ -0,0 +1,305 @@
+"""Prerequisite parsing and the unit prerequisite graph.
+
+``parse`` turns the free-text ``prerequisites`` / ``concurrent_prerequisite``
+columns ("COS10009", "COS10009 OR COS10026", "(COS10009 AND COS10026), TNE10006",
+"Nil") into a small expression tree:
+
+    None                  no requirement
+    ("unit", code)
+    ("and", [expr, ...])
+    ("or", [expr, ...])
+
+Commas, semicolons, "&" and "+" mean AND; "/" and "|" mean OR; AND binds
+tighter than OR.  Words that are not unit codes or operators (e.g. "Credit
+points") are ignored and kept in ``PrerequisiteGraph.notes``.  Text the
+grammar cannot consume to the end (e.g. an unmatched ")") raises
+``PrerequisiteParseError``; the graph reports such units under ``errors``
+and requires every unit code they mention rather than guessing.
+
+``PrerequisiteGraph`` holds the parsed expressions for the whole unit
+catalogue, finds prerequisite cycles once with an iterative Tarjan SCC, and
+validates a study planner's year/semester ordering in O(V+E).
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+Expr = Optional[tuple]
+
+UNIT_CODE_RE = re.compile(r"^[A-Z]{2,5}\d{4,6}[A-Z]?$")
+TOKEN_RE = re.compile(r"\(|\)|,|;|&|\+|/|\||[A-Za-z0-9\-]+")
+EMPTY_TEXT = {"", "nil", "none", "nan", "null", "-", "—", "n/a", "na"}
+# planner rows with these codes are elective placeholders
+EMPTY_TEXT_UPPER = {t.upper() for t in EMPTY_TEXT} | {"0"}
+AND_WORDS = {"and", ",", ";", "&", "+"}
+OR_WORDS = {"or", "/", "|"}
+
+
+class PrerequisiteParseError(ValueError):
+    pass
+
+
+def tokenize(text: str) -> Tuple[List[str], List[str]]:
+    """Operator/code tokens, plus the words that were neither."""
+    tokens, ignored = [], []
+    for raw in TOKEN_RE.findall(text):
+        lower = raw.lower()
+        if raw in ("(", ")") or lower in AND_WORDS or lower in OR_WORDS:
+            tokens.append(lower)
+        elif UNIT_CODE_RE.match(raw.upper()):
+            tokens.append(raw.upper())
+        else:
+            ignored.append(raw)
+    return tokens, ignored
+
+
+def _combine(op: str, parts: List[Expr]) -> Expr:
+    flat = []
+    for part in parts:
+        if part is None:
+            continue
+        if part[0] == op:
+            flat.extend(part[1])
+        elif part not in flat:
+            flat.append(part)
+    if not flat:
+        return None
+    return flat[0] if len(flat) == 1 else (op, flat)
+
+
+class _Parser:
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def expr(self) -> Expr:
+        parts = [self.term()]
+        while self.peek() in OR_WORDS:
+            self.pos += 1
+            parts.append(self.term())
+        return _combine("or", parts)
+
+    def term(self) -> Expr:
+        parts = [self.factor()]
+        while True:
+            token = self.peek()
+            if token in AND_WORDS:
+                self.pos += 1
+            elif token is None or token == ")" or token in OR_WORDS:
+                break
+            # two operands side by side ("COS10009 COS10026") read as AND
+            parts.append(self.factor())
+        return _combine("and", parts)
+
+    def factor(self) -> Expr:
+        token = self.peek()
+        if token is None:
+            return None
+        self.pos += 1
+        if token == "(":
+            inner = self.expr()
+            if self.peek() == ")":
+                self.pos += 1
+            return inner
+        if token == ")":
+            raise PrerequisiteParseError(f"Unmatched ')' at token {self.pos}")
+        if token in AND_WORDS or token in OR_WORDS:
+            # dangling operator, e.g. "COS10009 AND" or "OR COS10026"
+            return None
+        return ("unit", token)
+
+
+def parse(text) -> Expr:
+    if text is None or str(text).strip().lower() in EMPTY_TEXT:
+        return None
+    tokens, _ = tokenize(str(text))
+    parser = _Parser(tokens)
+    expr = parser.expr()
+    if parser.peek() is not None:
+        raise PrerequisiteParseError(f"Unexpected {parser.peek()!r} at token {parser.pos + 1}")
+    return expr
+
+
+def parse_reported(text) -> Tuple[Expr, Optional[str]]:
+    """(expression, error): a text that does not parse requires all the unit codes in it."""
+    try:
+        return parse(text), None
+    except PrerequisiteParseError as e:
+        mentioned = [t for t in tokenize(str(text))[0] if UNIT_CODE_RE.match(t)]
+        return _combine("and", [("unit", code) for code in mentioned]), f"{e} of {str(text)!r}"
+
+
+def codes(expr: Expr) -> Set[str]:
+    if expr is None:
+        return set()
+    if expr[0] == "unit":
+        return {expr[1]}
+    found: Set[str] = set()
+    for part in expr[1]:
+        found |= codes(part)
+    return found
+
+
+def satisfied(expr: Expr, done: Set[str]) -> bool:
+    if expr is None:
+        return True
+    if expr[0] == "unit":
+        return expr[1] in done
+    if expr[0] == "and":
+        return all(satisfied(part, done) for part in expr[1])
+    return any(satisfied(part, done) for part in expr[1])
+
+
+def to_text(expr: Expr) -> Optional[str]:
+    if expr is None:
+        return None
+    if expr[0] == "unit":
+        return expr[1]
+    joined = f" {expr[0].upper()} ".join(
+        f"({to_text(p)})" if p[0] not in ("unit", expr[0]) else to_text(p) for p in expr[1])
+    return joined
+
+
+def normalize_code(code) -> str:
+    return "" if code is None else str(code).strip().upper()
+
+
+def term_key(year, semester) -> Tuple:
+    """Sort key for a planner slot; semesters like "1", "Semester 2" or "Summer"."""
+    try:
+        year_key = int(year)
+    except (TypeError, ValueError):
+        year_key = 0
+    text = str(semester or "").strip()
+    digits = re.search(r"\d+", text)
+    return (year_key, int(digits.group()) if digits else 0, text.lower())
+
+
+class PrerequisiteGraph:
+    def __init__(self, units: Iterable[dict]):
+        self.prerequisites: Dict[str, Expr] = {}
+        self.concurrent: Dict[str, Expr] = {}
+        self.notes: Dict[str, List[str]] = {}
+        self.errors: Dict[str, List[str]] = {}
+        for unit in units:
+            code = normalize_code(unit.get("unit_code"))
+            if not code:
+                continue
+            self.prerequisites[code], prereq_error = parse_reported(unit.get("prerequisites"))
+            self.concurrent[code], concurrent_error = parse_reported(unit.get("concurrent_prerequisite"))
+            errors = [e for e in (prereq_error, concurrent_error) if e]
+            if errors:
+                self.errors[code] = errors
+            ignored = [w for field in ("prerequisites", "concurrent_prerequisite")
+                       for w in tokenize(str(unit.get(field) or ""))[1] if w.lower() not in EMPTY_TEXT]
+            if ignored:
+                self.notes[code] = ignored
+        # strict prerequisite edges: unit -> units it requires
+        self.edges: Dict[str, List[str]] = {code: sorted(codes(expr)) for code, expr in self.prerequisites.items()}
+        self.cycles = self._find_cycles()
+
+    def __len__(self):
+        return len(self.prerequisites)
+
+    def _find_cycles(self) -> List[List[str]]:
+        """Strongly connected components with more than one unit (or a self-loop); iterative Tarjan."""
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        cycles: List[List[str]] = []
+        counter = 0
+        for root in self.edges:
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work.pop()
+                if child == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack.add(node)
+                neighbours = self.edges.get(node, [])
+                if child < len(neighbours):
+                    work.append((node, child + 1))
+                    nxt = neighbours[child]
+                    if nxt not in index:
+                        if nxt in self.edges:
+                            work.append((nxt, 0))
+                    elif nxt in on_stack:
+                        low[node] = min(low[node], index[nxt])
+                    continue
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.edges.get(node, []):
+                        cycles.append(sorted(component))
+        return cycles
+
+    def validate_planner(self, planner_units: List[dict]) -> Dict[str, Any]:
+        """Check that every planned unit's prerequisites are placed in earlier terms.
+
+        Catalogue prerequisites are used, falling back to the planner row's own
+        ``prerequisites`` text for units missing from the catalogue.  Concurrent
+        prerequisites may also sit in the same term.
+        """
+        slots: Dict[Tuple, List[dict]] = {}
+        planned: Set[str] = set()
+        for unit in planner_units:
+            code = normalize_code(unit.get("unit_code"))
+            if not code or code in EMPTY_TEXT_UPPER:
+                continue
+            planned.add(code)
+            slots.setdefault(term_key(unit.get("year"), unit.get("semester")), []).append(unit)
+
+        violations, missing = [], []
+        errors = {code: self.errors[code] for code in sorted(planned) if code in self.errors}
+        placed: Set[str] = set()
+        for key in sorted(slots):
+            term_units = slots[key]
+            this_term = {normalize_code(u.get("unit_code")) for u in term_units}
+            for unit in term_units:
+                code = normalize_code(unit.get("unit_code"))
+                if code in self.prerequisites:
+                    prereq, concurrent = self.prerequisites[code], self.concurrent[code]
+                else:
+                    prereq, error = parse_reported(unit.get("prerequisites"))
+                    concurrent = None
+                    if error:
+                        errors[code] = [error]
+                slot = {"unit_code": code, "year": unit.get("year"), "semester": unit.get("semester")}
+                for kind, expr, available in (("prerequisite", prereq, placed),
+                                              ("concurrent", concurrent, placed | this_term)):
+                    if satisfied(expr, available):
+                        continue
+                    if satisfied(expr, planned):
+                        later = sorted(c for c in codes(expr) if c in planned and c not in available)
+                        violations.append({**slot, "type": kind, "requires": to_text(expr), "placed_later": later})
+                    else:
+                        missing.append({**slot, "type": kind, "requires": to_text(expr),
+                                        "not_in_planner": sorted(codes(expr) - planned)})
+            placed |= this_term
+
+        cycles = [cycle for cycle in self.cycles if planned.intersection(cycle)]
+        return {
+            "valid": not violations and not missing and not cycles and not errors,
+            "units_checked": len(planned),
+            "violations": violations,
+            "missing_prerequisites": missing,
+            "cycles": cycles,
+            "malformed_prerequisites": errors,
+            "unparsed": {code: self.notes[code] for code in sorted(planned) if code in self.notes},
+        }
+
@@ -0,0 +1,56 @@
+"""Per-user, per-deployment files shared by the workers on one host.
+
+The upload outcome store, the cache bus log and the analytics snapshot
+keep state next to the app that every worker reads.  By default it lives
+in ``ssps-<uid>`` under the temp directory, created 0700, and each file name
+carries a hash of ``SUPABASE_URL``, so staging, production and a local
+stand-in on one host never read each other's state.  A directory is only
+used while it is owned by this user and not writable by anyone else;
+otherwise another local user could have planted the files in it.  Paths
+set explicitly through the environment are used as given.
+"""
+
+import hashlib
+import os
+import stat
+import tempfile
+from typing import Optional
+
+
+def user_directory() -> str:
+    return os.path.join(tempfile.gettempdir(), f"ssps-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+
+
+def source_key(source: Optional[str] = None) -> str:
+    """Short hash of the Supabase project this process talks to."""
+    source = os.getenv("SUPABASE_URL") if source is None else source
+    return hashlib.sha256((source or "").encode()).hexdigest()[:12]
+
+
+def state_path(name: str, suffix: str = "", source: Optional[str] = None) -> str:
+    """Default path of the ``name`` file (or directory) for this deployment."""
+    return os.path.join(user_directory(), f"{name}-{source_key(source)}{suffix}")
+
+
+def ensure_private(directory: str) -> bool:
+    """Create ``directory`` (0700) if missing; True if only this user can change what is in it."""
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+    except OSError as e:
+        print(f"Directory {directory} unusable:", e)
+        return False
+    if not stat.S_ISDIR(info.st_mode):  # e.g. a symlink planted in the temp directory
+        ok = False
+    elif not hasattr(os, "getuid"):
+        ok = True  # Windows: the temp directory is already per user
+    else:
+        ok = info.st_uid == os.getuid() and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    if not ok:
+        print(f"Directory {directory} is not private to this user; not using it")
+    return ok
+
+
+def private_path(name: str, suffix: str = "") -> Optional[str]:
+    """``state_path(name, suffix)`` in the private user directory; None if that directory is not private."""
+    return state_path(name, suffix) if ensure_private(user_directory()) else None
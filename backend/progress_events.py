@@ -0,0 +1,231 @@
+"""Progress events for long-running bulk uploads, streamed as Server-Sent Events.
+
+A bulk endpoint publishes events (``parsed``, ``validated``, ``inserted``,
+``failed``, ... and finally ``done``) to a job; ``GET /api/jobs/{id}/events``
+streams them.  The client picks the job id and sends it with the upload
+(``job_id`` form field), so it can subscribe before the upload starts.
+
+Each job keeps its last ``JOB_EVENT_BUFFER`` events (default 1000) in one
+ring buffer shared by all of its subscribers; a subscriber only holds a
+cursor into it, so memory per subscriber stays constant however far behind
+it is.  Event ids increase per job.  A reconnecting ``EventSource`` sends
+``Last-Event-ID`` and resumes after it; a subscriber that fell further
+behind than the buffer gets a ``gap`` event with the number of events it
+missed.  Finished jobs are kept for ``JOB_RETENTION`` seconds (default 600)
+so late or reconnecting subscribers still see the outcome.  A job that sees
+no events for that long (its upload was rejected before it started, or
+died) is dropped too, and its subscribers get a final ``expired`` event so
+the client can stop listening.
+
+With several uvicorn workers the subscriber usually lands on another
+worker than the upload, so events go out through the cache bus
+(``cache_bus.py``): every worker keeps a copy of each job, fed from the
+bus log, and the publishing worker's event ids are kept.  Other workers
+see an event within ``CACHE_BUS_INTERVAL``.  With ``CACHE_BUS=off`` events
+stay in the worker that ran the upload, so run one worker or route
+``/api/jobs/*`` to the same worker as the uploads.
+
+Publishing is thread-safe: the bulk endpoints run in the threadpool and
+the bus polls in its own thread; both wake subscribers on the event loop
+through ``call_soon_threadsafe``.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import cache_bus
+
+BUFFER_SIZE = int(os.getenv("JOB_EVENT_BUFFER", "1000"))
+RETENTION = float(os.getenv("JOB_RETENTION", "600"))
+MAX_JOBS = 256
+HEARTBEAT = 15.0
+JOB_ID = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+
+stats: Dict[str, int] = {"jobs": 0, "events": 0, "subscribers": 0, "gaps": 0}
+
+
+class Job:
+    def __init__(self, job_id: str, kind: Optional[str] = None, run: Optional[str] = None):
+        self.id = job_id
+        self.kind = kind
+        self.run = run  # one upload under this job_id; None until an upload claims it
+        self.events: deque = deque(maxlen=BUFFER_SIZE)  # (id, event, data)
+        self.last_id = 0
+        self._published = 0
+        self.finished_at: Optional[float] = None
+        self.touched_at = time.time()
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def publish(self, event: str, **data: Any) -> None:
+        """Add an event to this job in every worker (see ``deliver``)."""
+        with self._lock:
+            if self.finished:
+                return
+            self._published += 1
+            event_id = self._published
+        cache_bus.publish("job_event", job_id=self.id, run=self.run, kind=self.kind,
+                          event_id=event_id, event=event, data=data)
+
+    def _append(self, event_id: int, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            if self.finished or event_id <= self.last_id:
+                return
+            self.last_id = event_id
+            self.events.append((self.last_id, event, data))
+            self.touched_at = time.time()
+            if event == "done":
+                self.finished_at = self.touched_at
+            waiters, self._waiters = self._waiters, []
+        stats["events"] += 1
+        for loop, woken in waiters:
+            try:
+                loop.call_soon_threadsafe(woken.set)
+            except RuntimeError:  # the subscriber's loop is gone
+                pass
+
+    def since(self, last_id: int) -> Tuple[int, List[Tuple[int, str, Dict]]]:
+        """(events missed because they left the buffer, buffered events after ``last_id``)."""
+        with self._lock:
+            if not self.events:
+                return 0, []
+            first = self.events[0][0]
+            missed = max(0, first - last_id - 1)
+            start = max(0, last_id + 1 - first)
+            return missed, list(self.events)[start:]
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        """Past retention: finished long ago, or never heard from again."""
+        now = time.time() if now is None else now
+        return now - (self.finished_at if self.finished else self.touched_at) > RETENTION
+
+    def _waiter(self, last_id: int) -> Optional[asyncio.Event]:
+        """An event set on the next publish, or None if there is already news."""
+        with self._lock:
+            if self.last_id > last_id or self.finished:
+                return None
+            woken = asyncio.Event()
+            self._waiters.append((asyncio.get_running_loop(), woken))
+            return woken
+
+    def summary(self) -> Dict[str, Any]:
+        last = self.events[-1] if self.events else None
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "finished": self.finished,
+            "last_event_id": self.last_id,
+            "last_event": {"id": last[0], "event": last[1], "data": last[2]} if last else None,
+        }
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def job(self, job_id: Optional[str], kind: Optional[str] = None) -> Optional[Job]:
+        """The job for ``job_id``, created if new; None when no (valid) id was given."""
+        if not job_id or not JOB_ID.match(job_id):
+            return None
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is None or (kind and job.finished):
+                # a finished job id reused for a new upload starts over
+                job = Job(job_id, kind, uuid.uuid4().hex if kind else None)
+                self._jobs[job_id] = job
+                stats["jobs"] += 1
+            elif kind:
+                job.kind = job.kind or kind
+                job.run = job.run or uuid.uuid4().hex
+            self._jobs.move_to_end(job_id)
+            return job
+
+    def attach(self, job_id: str, run: Optional[str], kind: Optional[str]) -> Job:
+        """This worker's copy of a job another worker (or this one) publishes to."""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is None or (job.run is not None and job.run != run):
+                job = Job(job_id, kind, run)  # new, or a later upload reusing the job_id
+                self._jobs[job_id] = job
+                stats["jobs"] += 1
+            elif job.run is None:
+                job.run, job.kind = run, job.kind or kind
+            self._jobs.move_to_end(job_id)
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _expire(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.expired(now):
+                del self._jobs[job_id]  # done long ago, nobody ever published, or the upload died
+        while len(self._jobs) > MAX_JOBS:
+            self._jobs.popitem(last=False)
+
+
+broker = Broker()
+
+
+@cache_bus.handler("job_event")
+def deliver(job_id: str, run: Optional[str], kind: Optional[str], event_id: int, event: str,
+            data: Dict[str, Any]) -> None:
+    """Apply a published event to this worker's copy of the job (called through the cache bus)."""
+    broker.attach(job_id, run, kind)._append(event_id, event, data)
+
+
+def publish(job: Optional[Job], event: str, **data: Any) -> None:
+    """``job.publish`` for callers whose job is optional (no ``job_id`` sent)."""
+    if job is not None:
+        job.publish(event, **data)
+
+
+def format_event(event_id: int, event: str, data: Dict[str, Any]) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+async def stream(job: Job, last_id: int = 0, heartbeat: float = HEARTBEAT) -> AsyncIterator[bytes]:
+    """SSE frames for ``job`` after ``last_id``, until the job is done or expires."""
+    if last_id > job.last_id:
+        last_id = 0  # an id from an earlier job under the same job_id
+    stats["subscribers"] += 1
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            missed, events = job.since(last_id)
+            if missed:
+                stats["gaps"] += 1
+                yield f"event: gap\ndata: {json.dumps({'missed': missed})}\n\n".encode()
+            for event_id, event, data in events:
+                yield format_event(event_id, event, data)
+                last_id = event_id
+            if job.finished and last_id >= job.last_id:
+                return
+            woken = job._waiter(last_id)
+            if woken is None:
+                continue
+            try:
+                await asyncio.wait_for(woken.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if job.expired() or broker.get(job.id) is not job:
+                    yield f"event: expired\ndata: {json.dumps({'job_id': job.id})}\n\n".encode()
+                    return
+                yield b": keep-alive\n\n"
+    finally:
+        stats["subscribers"] -= 1
@@ -0,0 +1,154 @@
+"""Retries, backoff and a circuit breaker around Supabase (PostgREST) calls.
+
+``supabaseClient`` wraps every query builder so that ``.execute()`` goes
+through ``call()`` here:
+
+* transient failures (connection errors, timeouts, 5xx/429 responses,
+  Postgres serialization/deadlock/connection errors) are retried up to
+  ``SUPABASE_RETRIES`` times (default 2) with full-jitter exponential
+  backoff starting at ``SUPABASE_BACKOFF`` seconds (default 0.1);
+* only idempotent requests are retried: reads, updates, deletes and
+  upserts.  A plain insert is retried only when the connection failed
+  before the request was sent, so a row is never inserted twice;
+* every HTTP call is bounded by ``SUPABASE_TIMEOUT`` seconds (default 10),
+  set on the client's session;
+* after ``SUPABASE_BREAKER_THRESHOLD`` transient failures in a row (default
+  5) the breaker opens and calls fail at once with ``CircuitOpenError`` for
+  ``SUPABASE_BREAKER_COOLDOWN`` seconds (default 15).  Then one trial call
+  is let through: success closes the breaker, failure opens it again.
+
+Errors that say something about the request itself (constraint
+violations, bad filters, 4xx) are raised straight away and do not count
+against the breaker.  State and counters are reported by ``stats()``.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+RETRIES = int(os.getenv("SUPABASE_RETRIES", "2"))
+BACKOFF = float(os.getenv("SUPABASE_BACKOFF", "0.1"))
+BACKOFF_CAP = 2.0
+BREAKER_THRESHOLD = int(os.getenv("SUPABASE_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("SUPABASE_BREAKER_COOLDOWN", "15"))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PATCH", "PUT", "DELETE"}
+# Postgres/PostgREST error codes worth another attempt: serialization failure, deadlock,
+# statement timeout, too many connections, connection exceptions, PostgREST connection errors
+TRANSIENT_PG_CODES = ("40001", "40P01", "57014", "53300", "08", "PGRST000", "PGRST001", "PGRST002", "PGRST003")
+
+
+class CircuitOpenError(Exception):
+    """Supabase is failing; the call was not attempted."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Database temporarily unavailable; retry in {retry_after:.0f}s")
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial:
+                self._trial = True  # this caller probes; the others keep failing fast
+                return
+            counters["short_circuited"] += 1
+            raise CircuitOpenError(max(1.0, remaining))
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial = False
+            self.state = "closed"
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold > 0):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+
+
+breaker = CircuitBreaker()
+counters: Dict[str, int] = {"calls": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    code = str(getattr(error, "code", "") or "")
+    if code.isdigit() and len(code) == 3:  # an HTTP status when PostgREST sent no JSON error
+        return code.startswith("5") or code == "429"
+    return code.startswith(TRANSIENT_PG_CODES)
+
+
+def not_sent(error: Exception) -> bool:
+    """The request never reached the server, so even a non-idempotent one may be repeated."""
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def is_idempotent(method: str, headers) -> bool:
+    if method in IDEMPOTENT_METHODS:
+        return True
+    # upserts are POSTs with a conflict resolution preference
+    return method == "POST" and "resolution=" in (headers.get("prefer") or "")
+
+
+def call(fn: Callable[[], Any], method: str = "GET", headers=None, retries: Optional[int] = None) -> Any:
+    """Run one Supabase request with retries and the circuit breaker."""
+    retries = RETRIES if retries is None else retries
+    idempotent = is_idempotent(method, headers or {})
+    attempt = 0
+    while True:
+        breaker.before_call()
+        counters["calls"] += 1
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_transient(e):
+                breaker.success()  # Supabase answered; the request itself was wrong
+                raise
+            counters["failures"] += 1
+            breaker.failure()
+            if attempt >= retries or not (idempotent or not_sent(e)):
+                raise
+            attempt += 1
+            counters["retries"] += 1
+            time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF * 2 ** attempt)))
+            continue
+        breaker.success()
+        return result
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "state": breaker.state,
+        "consecutive_failures": breaker.failures,
+        "times_opened": breaker.times_opened,
+        **counters,
+    }
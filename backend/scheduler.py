@@ -0,0 +1,291 @@
+"""Semester-by-semester scheduling of a student's remaining units.
+
+Units are placed into future terms so that prerequisites are passed in an
+earlier term, concurrent prerequisites are taken in the same term or
+before, each unit only runs in a term listed in its ``offered_terms``, and
+no term exceeds the credit cap.  Elective placeholders have no
+constraints and fill the capacity left over in each term.
+
+``Scheduler.plan`` first builds a greedy plan (critical-path priority).
+If that plan is longer than the lower bound (longest prerequisite chain,
+total credits / cap), an iterative-deepening search tries to prove a
+shorter one, branching over the highest-priority eligible units in each
+term.  The search is memoised on (remaining units, relevant passed
+units, term phase, electives left, terms allowed) and stops at a time
+budget, falling back to the best plan found so far (``search_complete``
+is then false).  The memo is kept per
+``Scheduler``, so students of one cohort with the same remaining units
+share the work; it is shared by concurrent requests, so it is only read
+and written under a lock.
+"""
+
+import itertools
+import math
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import graduation
+import prerequisites
+
+TERMS = ("Semester 1", "Semester 2")
+DEFAULT_CREDIT_CAP = 50.0
+MAX_TERMS = 16
+ELECTIVE = "ELECTIVE"
+ELECTIVE_CREDIT = graduation.unit_credit(ELECTIVE)
+MAX_MEMO_ENTRIES = 200_000
+# how many eligible units beyond what fits the cap a search step may consider
+BRANCH_SLACK = 2
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def offered_phases(offered_terms, terms: Tuple[str, ...] = TERMS) -> Optional[FrozenSet[int]]:
+    """Term phases a unit runs in; ``None`` when unknown (treated as every term)."""
+    text = str(offered_terms or "").strip().lower()
+    if not text or text in prerequisites.EMPTY_TEXT:
+        return None
+    return frozenset(i for i, label in enumerate(terms) if label.lower() in text)
+
+
+class Scheduler:
+    def __init__(self, graph: prerequisites.PrerequisiteGraph, units: Iterable[dict], terms: Tuple[str, ...] = TERMS):
+        self.graph = graph
+        self.terms = terms
+        self.offered: Dict[str, Optional[FrozenSet[int]]] = {}
+        self.names: Dict[str, str] = {}
+        for unit in units:
+            code = prerequisites.normalize_code(unit.get("unit_code"))
+            if code:
+                self.offered[code] = offered_phases(unit.get("offered_terms"), terms)
+                self.names[code] = unit.get("unit_name")
+        self._memo: Dict[tuple, Optional[tuple]] = {}
+        self._memo_lock = threading.Lock()
+        self.stats = {"plans": 0, "searched": 0, "memo_hits": 0, "timeouts": 0}
+
+    # ----- per-unit helpers -----
+    def _prereq(self, code: str):
+        return self.graph.prerequisites.get(code)
+
+    def _concurrent(self, code: str):
+        return self.graph.concurrent.get(code)
+
+    def _runs_in(self, code: str, phase: int) -> bool:
+        phases = self.offered.get(code)
+        return phases is None or phase in phases
+
+    def _credit(self, code: str) -> float:
+        return graduation.unit_credit(code)
+
+    def _depths(self, remaining: Set[str]) -> Dict[str, int]:
+        """Longest chain of remaining units that depend on each unit (critical path)."""
+        dependents: Dict[str, List[str]] = {code: [] for code in remaining}
+        for code in remaining:
+            for required in prerequisites.codes(self._prereq(code)):
+                if required in dependents:
+                    dependents[required].append(code)
+        depth: Dict[str, int] = {}
+        for root in remaining:
+            stack = [(root, False)]
+            visiting: Set[str] = set()
+            while stack:
+                code, expanded = stack.pop()
+                if code in depth:
+                    continue
+                if expanded:
+                    visiting.discard(code)
+                    depth[code] = 1 + max((depth.get(d, 0) for d in dependents[code]), default=0)
+                    continue
+                if code in visiting:
+                    continue  # cycle; those units stay unscheduled
+                visiting.add(code)
+                stack.append((code, True))
+                stack.extend((d, False) for d in dependents[code] if d not in depth)
+        return depth
+
+    def _eligible(self, remaining: FrozenSet[str], done: FrozenSet[str], phase: int) -> List[str]:
+        ready = [c for c in remaining if self._runs_in(c, phase) and prerequisites.satisfied(self._prereq(c), done)]
+        pool = done | set(ready)
+        return [c for c in ready if prerequisites.satisfied(self._concurrent(c), pool)]
+
+    def _valid_term(self, chosen: Iterable[str], done: FrozenSet[str]) -> bool:
+        pool = done | set(chosen)
+        return all(prerequisites.satisfied(self._concurrent(c), pool) for c in chosen)
+
+    # ----- planning -----
+    def plan(self, passed: Iterable[str], remaining: Iterable[str], electives: int = 0, start_phase: int = 0,
+             credit_cap: float = DEFAULT_CREDIT_CAP, budget_s: float = 0.2) -> Dict:
+        """Relative plan: ``terms`` is a list of unit-code lists, the first run in ``start_phase``."""
+        started = time.perf_counter()
+        with self._memo_lock:
+            self.stats["plans"] += 1
+            if len(self._memo) > MAX_MEMO_ENTRIES:
+                self._memo.clear()
+
+        done = frozenset(prerequisites.normalize_code(c) for c in passed)
+        todo = {prerequisites.normalize_code(c) for c in remaining} - done
+        unscheduled: Dict[str, str] = {}
+        for code in sorted(todo):
+            if self._credit(code) > credit_cap:
+                unscheduled[code] = "exceeds the credit cap on its own"
+            elif self.offered.get(code) == frozenset():
+                unscheduled[code] = "not offered in " + " or ".join(self.terms)
+        todo -= set(unscheduled)
+        # drop units whose prerequisites can never be met, until nothing else drops out
+        while True:
+            blocked = [c for c in todo if not prerequisites.satisfied(self._prereq(c), done | todo)]
+            if not blocked:
+                break
+            for code in blocked:
+                unscheduled[code] = "prerequisite not passed or planned: " + str(prerequisites.to_text(self._prereq(code)))
+            todo -= set(blocked)
+
+        depth = self._depths(todo)
+        greedy, left = self._greedy(frozenset(todo), done, electives, start_phase, credit_cap, depth)
+        for code in left:
+            unscheduled[code] = "prerequisite cycle or no feasible term"
+        todo -= set(left)
+
+        terms, complete = greedy, True
+        bound = self._lower_bound(todo, electives, credit_cap, depth)
+        if len(greedy) > bound:
+            self.stats["searched"] += 1
+            relevant = frozenset(done & set().union(*(prerequisites.codes(self._prereq(c)) | prerequisites.codes(self._concurrent(c))
+                                                      for c in todo))) if todo else frozenset()
+            deadline = started + budget_s
+            try:
+                for limit in range(bound, len(greedy)):
+                    found = self._search(frozenset(todo), relevant, electives, start_phase, limit, credit_cap, depth, deadline)
+                    if found is not None:
+                        terms = [list(t) for t in found]
+                        break
+            except _OutOfTime:
+                self.stats["timeouts"] += 1
+                complete = False
+
+        return {
+            "terms": terms,
+            "unscheduled": [{"unit_code": c, "reason": r} for c, r in unscheduled.items()],
+            "search_complete": complete,
+            "lower_bound": bound,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def _lower_bound(self, todo: Set[str], electives: int, credit_cap: float, depth: Dict[str, int]) -> int:
+        credits = sum(self._credit(c) for c in todo) + electives * ELECTIVE_CREDIT
+        return max(max((depth[c] for c in todo), default=0), math.ceil(credits / credit_cap) if credits else 0)
+
+    def _fill_electives(self, used: float, electives: int, credit_cap: float) -> int:
+        return min(electives, int((credit_cap - used) // ELECTIVE_CREDIT))
+
+    def _greedy(self, todo: FrozenSet[str], done: FrozenSet[str], electives: int, phase: int,
+                credit_cap: float, depth: Dict[str, int]) -> Tuple[List[List[str]], Set[str]]:
+        terms: List[List[str]] = []
+        idle = 0
+        while (todo or electives) and len(terms) < MAX_TERMS and idle < len(self.terms):
+            chosen, used = [], 0.0
+            for code in sorted(self._eligible(todo, done, phase), key=lambda c: (-depth[c], c)):
+                if used + self._credit(code) <= credit_cap:
+                    chosen.append(code)
+                    used += self._credit(code)
+            while chosen and not self._valid_term(chosen, done):
+                # a concurrent partner did not fit; drop the lowest-priority unit that needs one
+                needy = [c for c in chosen if not prerequisites.satisfied(self._concurrent(c), done | set(chosen))]
+                chosen.remove(needy[-1])
+                used -= self._credit(needy[-1])
+            fill = self._fill_electives(used, electives, credit_cap)
+            electives -= fill
+            terms.append(chosen + [ELECTIVE] * fill)
+            idle = 0 if chosen or fill else idle + 1
+            todo = todo - set(chosen)
+            done = done | set(chosen)
+            phase = (phase + 1) % len(self.terms)
+        while terms and not terms[-1]:
+            terms.pop()
+        return terms, set(todo)
+
+    def _search(self, todo: FrozenSet[str], done: FrozenSet[str], electives: int, phase: int, limit: int,
+                credit_cap: float, depth: Dict[str, int], deadline: float) -> Optional[tuple]:
+        """A plan finishing within ``limit`` terms, or None; memoised."""
+        if not todo and not electives:
+            return ()
+        if limit <= 0 or self._lower_bound(todo, electives, credit_cap, depth) > limit:
+            return None
+        key = (todo, done, electives, phase, limit, credit_cap)
+        with self._memo_lock:
+            if key in self._memo:
+                self.stats["memo_hits"] += 1
+                return self._memo[key]
+        if time.perf_counter() > deadline:
+            raise _OutOfTime()
+
+        eligible = sorted(self._eligible(todo, done, phase), key=lambda c: (-depth[c], c))
+        per_term = max(1, int(credit_cap // ELECTIVE_CREDIT))
+        candidates = eligible[:per_term + BRANCH_SLACK]
+        if sum(self._credit(c) for c in eligible) <= credit_cap:
+            options = [tuple(eligible)]  # everything fits: taking all of it is never worse
+        else:
+            options = []
+            for size in range(min(per_term, len(candidates)), 0, -1):
+                for combo in itertools.combinations(candidates, size):
+                    if sum(self._credit(c) for c in combo) <= credit_cap:
+                        options.append(combo)
+                if options:
+                    break
+        if not options:
+            options = [()]
+
+        result = None
+        next_phase = (phase + 1) % len(self.terms)
+        for combo in options:
+            if combo and not self._valid_term(combo, done):
+                continue
+            used = sum(self._credit(c) for c in combo)
+            fill = self._fill_electives(used, electives, credit_cap)
+            rest = self._search(todo - set(combo), done | set(combo), electives - fill, next_phase, limit - 1,
+                                credit_cap, depth, deadline)
+            if rest is not None:
+                result = (tuple(combo) + (ELECTIVE,) * fill,) + rest
+                break
+        with self._memo_lock:
+            self._memo[key] = result
+        return result
+
+    def schedule_progress(self, progress: Dict, start_year: int, start_phase: int = 0,
+                          credit_cap: float = DEFAULT_CREDIT_CAP, budget_s: float = 0.2) -> Dict:
+        """Plan the ``remaining_units`` of a ``graduation.evaluate_progress`` result from a start term."""
+        passed = [u["unit_code"] for u in progress.get("student_units") or []
+                  if u.get("unit_code") and graduation.is_passed(u.get("grade"))]
+        remaining, electives = [], 0
+        names: Dict[str, str] = {}  # per call: this Scheduler is shared by concurrent requests
+        for unit in progress.get("remaining_units") or []:
+            code = prerequisites.normalize_code(unit.get("unit_code"))
+            if code in prerequisites.EMPTY_TEXT_UPPER:
+                electives += 1
+            else:
+                remaining.append(code)
+                names[code] = self.names.get(code) or unit.get("unit_name")
+
+        result = self.plan(passed, remaining, electives, start_phase, credit_cap, budget_s)
+        terms = []
+        for offset, codes in enumerate(result["terms"]):
+            slot = start_phase + offset
+            terms.append({
+                "year": start_year + slot // len(self.terms),
+                "term": self.terms[slot % len(self.terms)],
+                "units": [{"unit_code": c, "unit_name": "Elective" if c == ELECTIVE else names.get(c, self.names.get(c)),
+                           "credit_point": ELECTIVE_CREDIT if c == ELECTIVE else self._credit(c)} for c in codes],
+                "credits": sum(ELECTIVE_CREDIT if c == ELECTIVE else self._credit(c) for c in codes),
+            })
+        return {**result, "terms": terms, "terms_needed": len(terms)}
+
+
+def next_term(today, terms: Tuple[str, ...] = TERMS) -> Tuple[int, int]:
+    """(year, phase) of the first term that has not started yet: Semester 1 from March, Semester 2 from August."""
+    if today.month < 3:
+        return today.year, 0
+    if today.month < 8 and len(terms) > 1:
+        return today.year, 1
+    return today.year + 1, 0
@@ -0,0 +1,207 @@
+"""In-process search index over students for typeahead lookups.
+
+Matches student_id prefixes, name token prefixes and email prefixes without
+a database round trip.  The index is loaded once at startup and kept current
+by the student create/update/delete/upload handlers.  A (re)load pages the
+whole table first; writes that arrive meanwhile are recorded from
+``begin_load`` and replayed after ``load``, so they are not lost to an
+older copy of the table.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Columns kept per student; everything a search result row needs
+INDEX_FIELDS = (
+    "student_id",
+    "student_name",
+    "student_email",
+    "student_course",
+    "student_major",
+    "intake_year",
+    "intake_term",
+)
+
+TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text) -> List[str]:
+    return TOKEN_RE.findall(str(text or "").lower())
+
+
+class StudentSearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._students: Dict[int, dict] = {}
+        self._student_tokens: Dict[int, Set[str]] = {}
+        self._token_ids: Dict[str, Set[int]] = {}
+        # sorted views, rebuilt lazily after writes
+        self._sorted_tokens: List[str] = []
+        self._sorted_ids: List[str] = []
+        self._sorted_emails: List[tuple] = []
+        self._dirty = False
+        self.ready = False
+        # writes made while loads are in progress: (sequence, row or None, student_id)
+        self._loads = 0
+        self._seq = 0
+        self._log: List[Tuple[int, Optional[dict], int]] = []
+
+    def __len__(self):
+        return len(self._students)
+
+    def begin_load(self) -> int:
+        """Start recording writes before fetching the rows for ``load``; pass the mark on to it."""
+        with self._lock:
+            self._loads += 1
+            return self._seq
+
+    def end_load(self, mark: int) -> None:
+        """Stop recording for a load that was abandoned (``load`` calls this itself)."""
+        with self._lock:
+            self._loads -= 1
+            if not self._loads:
+                self._log.clear()
+
+    def load(self, rows: Iterable[dict], mark: Optional[int] = None) -> None:
+        """Replace the index with ``rows``, then replay the writes recorded since ``begin_load``."""
+        with self._lock:
+            self._students.clear()
+            self._student_tokens.clear()
+            self._token_ids.clear()
+            for row in rows:
+                self._add(row)
+            if mark is not None:
+                for seq, row, student_id in self._log:
+                    if seq > mark and row is not None:
+                        self._add(row)
+                    elif seq > mark:
+                        self._discard(student_id)
+                self.end_load(mark)
+            self._dirty = True
+            self.ready = True
+
+    def upsert(self, row: dict) -> None:
+        self.upsert_many([row])
+
+    def upsert_many(self, rows: Iterable[dict]) -> None:
+        with self._lock:
+            for row in rows:
+                self._add(row)
+                self._record(row, row.get("student_id"))
+            self._dirty = True
+
+    def remove(self, student_id) -> None:
+        with self._lock:
+            self._discard(int(student_id))
+            self._record(None, int(student_id))
+            self._dirty = True
+
+    def search(self, q: str, limit: int = 20) -> List[dict]:
+        query = (q or "").strip().lower()
+        if not query:
+            return []
+        with self._lock:
+            self._refresh()
+            if "@" in query:
+                ids = self._email_prefix(query)
+            else:
+                terms = sorted(set(tokenize(query)), key=len, reverse=True)
+                ids = self._match_terms(terms)
+            results = [self._students[i] for i in ids]
+
+        # exact id first, then id prefix matches, then alphabetical by name; ranked over every
+        # match, so the first `limit` names are returned rather than an arbitrary `limit`
+        return heapq.nsmallest(limit, results, key=lambda s: (str(s["student_id"]) != query,
+                                                              not str(s["student_id"]).startswith(query),
+                                                              str(s.get("student_name") or "").lower()))
+
+    # ----- internals (caller holds the lock) -----
+    def _record(self, row: Optional[dict], student_id) -> None:
+        if self._loads and student_id is not None:
+            self._seq += 1
+            self._log.append((self._seq, row, int(student_id)))
+
+    def _add(self, row: dict) -> None:
+        if row.get("student_id") is None:
+            return
+        student_id = int(row["student_id"])
+        self._discard(student_id)
+        doc = {field: row.get(field) for field in INDEX_FIELDS}
+        doc["student_id"] = student_id
+        email = str(doc.get("student_email") or "").lower()
+        tokens = set(tokenize(doc.get("student_name"))) | set(tokenize(email.split("@")[0]))
+        self._students[student_id] = doc
+        self._student_tokens[student_id] = tokens
+        for token in tokens:
+            self._token_ids.setdefault(token, set()).add(student_id)
+
+    def _discard(self, student_id: int) -> None:
+        if self._students.pop(student_id, None) is None:
+            return
+        for token in self._student_tokens.pop(student_id, ()):
+            ids = self._token_ids.get(token)
+            if ids is not None:
+                ids.discard(student_id)
+                if not ids:
+                    del self._token_ids[token]
+
+    def _refresh(self) -> None:
+        if not self._dirty:
+            return
+        self._sorted_tokens = sorted(self._token_ids)
+        self._sorted_ids = sorted(str(i) for i in self._students)
+        self._sorted_emails = sorted(
+            (str(s.get("student_email") or "").lower(), i) for i, s in self._students.items()
+        )
+        self._dirty = False
+
+    @staticmethod
+    def _prefix_range(sorted_list: List[str], prefix: str) -> range:
+        lo = bisect.bisect_left(sorted_list, prefix)
+        return range(lo, bisect.bisect_left(sorted_list, prefix + "\uffff"))
+
+    def _email_prefix(self, query: str) -> List[int]:
+        lo = bisect.bisect_left(self._sorted_emails, (query,))
+        hi = bisect.bisect_left(self._sorted_emails, (query + "\uffff",))
+        return [i for _, i in self._sorted_emails[lo:hi]]
+
+    def _term_ids(self, term: str) -> Iterator[int]:
+        """Ids matching one term, lazily: id prefix matches first, then name/email tokens."""
+        if term.isdigit():
+            for pos in self._prefix_range(self._sorted_ids, term):
+                yield int(self._sorted_ids[pos])
+        for pos in self._prefix_range(self._sorted_tokens, term):
+            yield from self._token_ids[self._sorted_tokens[pos]]
+
+    def _term_set(self, term: str) -> Set[int]:
+        positions = self._prefix_range(self._sorted_tokens, term)
+        if len(positions) == 1 and not term.isdigit():
+            # shared with the index; callers must not mutate it
+            return self._token_ids[self._sorted_tokens[positions[0]]]
+        return set(self._term_ids(term))
+
+    def _match_terms(self, terms: List[str]) -> List[int]:
+        if not terms:
+            return []
+        if len(terms) == 1:
+            return list(self._term_set(terms[0]))
+
+        # intersect the selective terms; very short ones only filter the result
+        selective = [t for t in terms if len(t) >= 2] or terms[:1]
+        sets = sorted((self._term_set(t) for t in selective), key=len)
+        candidates = sets[0].intersection(*sets[1:])
+        for term in terms:
+            if term in selective:
+                continue
+            candidates = {
+                i for i in candidates
+                if any(t.startswith(term) for t in self._student_tokens[i])
+                or (term.isdigit() and str(i).startswith(term))
+            }
+        return list(candidates)
+
+
+student_index = StudentSearchIndex()
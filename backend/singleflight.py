@@ -0,0 +1,103 @@
+"""Single-flight coalescing for hot, identical read requests.
+
+When several identical requests arrive while one is already being served,
+they wait for that in-flight call and share its result (or its exception)
+instead of each going to Supabase.  Nothing is cached once the call is done.
+
+Endpoints opt in with ``@coalesce("name")``; a name can be switched off with
+``SINGLEFLIGHT_DISABLE=name,other`` or ``set_enabled(name, False)``.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+_disabled = {n.strip() for n in os.getenv("SINGLEFLIGHT_DISABLE", "").split(",") if n.strip()}
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, field: str) -> None:
+        entry = self.stats.setdefault(name, {"executed": 0, "shared": 0})
+        entry[field] += 1
+
+    def do(self, key: Hashable, fn: Callable[[], Any], name: str = "") -> Any:
+        """Run ``fn`` once per key for all concurrent callers (thread version)."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            self._count(name, "executed" if leader else "shared")
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any], name: str = "") -> Any:
+        """Same as ``do`` for coroutines on the event loop."""
+        future = self._async_calls.get(key)
+        if future is not None:
+            self._count(name, "shared")
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._async_calls[key] = future
+        self._count(name, "executed")
+        try:
+            future.set_result(await fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._async_calls.pop(key, None)
+        return future.result()
+
+
+group = SingleFlight()
+
+
+def set_enabled(name: str, enabled: bool) -> None:
+    if enabled:
+        _disabled.discard(name)
+    else:
+        _disabled.add(name)
+
+
+def request_key(name: str, args: tuple, kwargs: dict) -> Hashable:
+    return (name, args, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+
+def coalesce(name: str):
+    """Decorate a read-only endpoint so identical concurrent calls share one execution."""
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if name in _disabled:
+                    return await fn(*args, **kwargs)
+                return await group.do_async(request_key(name, args, kwargs), lambda: fn(*args, **kwargs), name)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if name in _disabled:
+                return fn(*args, **kwargs)
+            return group.do(request_key(name, args, kwargs), lambda: fn(*args, **kwargs), name)
+        return wrapper
+
+    return decorator
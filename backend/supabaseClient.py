@@ -1,6 +1,8 @@
 from dotenv import load_dotenv
 import os
-from supabase import create_client
+import threading
+
+import resilience
 
 # Load the environment variables from .env file
 load_dotenv()  # This loads the .env file into the environment variables
@@ -9,9 +11,77 @@ load_dotenv()  # This loads the .env file into the environment variables
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Supabase URL or key is missing")
+_client = None
+_client_lock = threading.Lock()
 
-# Create and return the Supabase client
+# Create (once) and return the shared Supabase client.
+# The supabase package is only imported here, which keeps it off the import path of main.py.
 def get_supabase_client():
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise ValueError("Supabase URL or key is missing")
+                from supabase import ClientOptions, create_client
+                # a per-call bound instead of the library's two-minute default
+                _client = create_client(SUPABASE_URL, SUPABASE_KEY,
+                                        options=ClientOptions(postgrest_client_timeout=resilience.TIMEOUT))
+    return _client
+
+# Drop the shared client (on shutdown); the next call to get_supabase_client() creates a new one.
+def close_supabase_client():
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        try:
+            client.postgrest.session.close()
+        except Exception:
+            pass
+
+class ResilientQuery:
+    """Wraps a PostgREST query builder so that execute() retries and respects the circuit breaker."""
+
+    __slots__ = ("_builder",)
+
+    def __init__(self, builder):
+        self._builder = builder
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return ResilientQuery(result) if hasattr(result, "execute") else result
+        return chained
+
+    def execute(self):
+        builder = self._builder
+        request = getattr(builder, "request", None)
+        if request is None:
+            return resilience.call(builder.execute)
+        builder.retry(False)  # retries happen in resilience.call, with jitter and for more than GETs
+        return resilience.call(builder.execute, request.http_method, request.headers)
+
+class LazySupabaseClient:
+    """Module-level stand-in for the client; forwards to get_supabase_client() on first use.
+
+    Queries started with table()/from_()/rpc() run through resilience (retries, circuit breaker).
+    """
+
+    def table(self, name):
+        return ResilientQuery(get_supabase_client().table(name))
+
+    def from_(self, name):
+        return ResilientQuery(get_supabase_client().from_(name))
+
+    def rpc(self, fn, params=None, **kwargs):
+        return ResilientQuery(get_supabase_client().rpc(fn, params or {}, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(get_supabase_client(), name)
+
+supabase_client = LazySupabaseClient()
@@ -0,0 +1,36 @@
+import pytest
+
+import prerequisites
+
+
+def test_parse_precedence():
+    assert prerequisites.parse("(COS10009 AND COS10026), TNE10006") == (
+        "and", [("unit", "COS10009"), ("unit", "COS10026"), ("unit", "TNE10006")])
+    assert prerequisites.parse("COS10009 OR COS10026 AND TNE10006") == (
+        "or", [("unit", "COS10009"), ("and", [("unit", "COS10026"), ("unit", "TNE10006")])])
+    assert prerequisites.parse("Nil") is None
+
+
+@pytest.mark.parametrize("text", ["COS10009) OR COS10026", "COS10009 AND COS10026)", ") COS10009"])
+def test_parse_rejects_leftover_tokens(text):
+    with pytest.raises(prerequisites.PrerequisiteParseError):
+        prerequisites.parse(text)
+
+
+def test_graph_reports_malformed_prerequisites():
+    graph = prerequisites.PrerequisiteGraph([
+        {"unit_code": "COS20007", "prerequisites": "COS10009) OR COS10026"},
+        {"unit_code": "COS10009", "prerequisites": None},
+        {"unit_code": "COS10026", "prerequisites": None},
+    ])
+    assert list(graph.errors) == ["COS20007"]
+    # every code mentioned is required, not just the part before the stray ")"
+    assert graph.prerequisites["COS20007"] == ("and", [("unit", "COS10009"), ("unit", "COS10026")])
+
+    result = graph.validate_planner([
+        {"unit_code": "COS10009", "year": 1, "semester": "1"},
+        {"unit_code": "COS10026", "year": 1, "semester": "1"},
+        {"unit_code": "COS20007", "year": 1, "semester": "2"},
+    ])
+    assert not result["valid"]
+    assert list(result["malformed_prerequisites"]) == ["COS20007"]
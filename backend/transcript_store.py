@@ -0,0 +1,244 @@
+"""Compact in-memory transcripts for cohort-scale work.
+
+``student_units`` rows arrive from Supabase as dicts, each repeating its
+keys and its unit code, name and grade strings: a few hundred bytes per
+row.  A ``TranscriptStore`` keeps the same rows as columns per student:
+
+* unit codes and unit names are interned in tables owned by the store and
+  stored as 2-byte ids (a store built on each load starts with fresh
+  tables, so renamed units do not pile up);
+* grades are a 1-byte enum (common grades are pre-assigned, others are
+  added on first sight);
+* ``completed`` is one byte.
+
+so a row costs about 6 bytes.  The rules the graduation code needs
+(passed = completed and not graded F, credits per unit) are precomputed per
+code and grade id, so ``Transcript.passed_codes()`` and
+``Transcript.total_credits()`` never build row dicts.  A ``Transcript``
+still iterates as dict rows, so any function written for lists of
+``student_units`` dicts accepts one; ``graduation``, ``completion_matrix``
+and ``analytics`` use the compact paths directly.
+
+Stores are filled a page at a time (``extend``), so the full list of dicts
+for a cohort never has to exist.  ``python -m perf.bench_transcripts``
+compares memory and speed with lists of dicts.
+"""
+
+import sys
+import threading
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import graduation
+from lazy_imports import LazyModule
+
+pd = LazyModule("pandas")
+
+# grade ids are stable for these; anything else is appended when first seen
+GRADES: Tuple[Optional[str], ...] = (None, "", "HD", "D", "C", "P", "N", "F", "FAIL", "PA", "CP", "UP", "NA", "W")
+MAX_IDS = {"H": 0xFFFF, "B": 0xFF}
+
+
+class InternTable:
+    """Values <-> small integer ids, shared by the transcripts of one store."""
+
+    def __init__(self, name: str, typecode: str, initial: Sequence = (None,)):
+        self.name = name
+        self.typecode = typecode
+        self.values: List[Any] = []
+        self.ids: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+        for value in initial:
+            self.id(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def id(self, value) -> int:
+        found = self.ids.get(value)
+        if found is not None:
+            return found
+        with self._lock:
+            found = self.ids.get(value)
+            if found is None:
+                found = len(self.values)
+                if found > MAX_IDS[self.typecode]:
+                    raise OverflowError(f"more than {MAX_IDS[self.typecode]} distinct {self.name} values")
+                self.values.append(value)
+                self._added(value)
+                self.ids[value] = found
+            return found
+
+    def _added(self, value) -> None:
+        pass
+
+
+class CodeTable(InternTable):
+    """Unit codes, with the normalized code and credit value of each id."""
+
+    def __init__(self):
+        self.normalized: List[str] = []
+        self.credits: List[float] = []
+        super().__init__("unit code", "H")
+
+    def _added(self, code) -> None:
+        norm = graduation.normalize_code(code)
+        self.normalized.append(norm)
+        self.credits.append(graduation.unit_credit(norm))
+
+
+class GradeTable(InternTable):
+    """Grades, with the two predicates the graduation rules use per id."""
+
+    def __init__(self):
+        self.counts_as_pass: List[bool] = []  # completed rows count unless graded exactly "F"
+        self.is_passed: List[bool] = []       # graduation.is_passed (progress view)
+        super().__init__("grade", "B", GRADES)
+
+    def _added(self, grade) -> None:
+        self.counts_as_pass.append(grade != "F")
+        self.is_passed.append(graduation.is_passed(grade))
+
+
+class Tables:
+    """The intern tables of one store."""
+
+    __slots__ = ("codes", "names", "grades")
+
+    def __init__(self):
+        self.codes = CodeTable()
+        self.names = InternTable("unit name", "H")
+        self.grades = GradeTable()
+
+
+class Transcript:
+    """One student's transcript rows as parallel arrays."""
+
+    __slots__ = ("student_id", "tables", "codes", "names", "grades", "completed")
+
+    def __init__(self, student_id=None, tables: Optional[Tables] = None):
+        self.student_id = student_id
+        self.tables = tables or Tables()
+        self.codes = array("H")
+        self.names = array("H")
+        self.grades = array("B")
+        self.completed = array("B")
+
+    def append(self, row: dict) -> None:
+        tables = self.tables
+        self.codes.append(tables.codes.id(row.get("unit_code")))
+        self.names.append(tables.names.id(row.get("unit_name")))
+        self.grades.append(tables.grades.id(row.get("grade")))
+        self.completed.append(1 if row.get("completed") else 0)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.rows())
+
+    def rows(self) -> List[dict]:
+        """The rows as ``student_units`` dicts (built on demand)."""
+        tables = self.tables
+        code_values, name_values, grade_values = tables.codes.values, tables.names.values, tables.grades.values
+        return [
+            {"student_id": self.student_id, "unit_code": code_values[c], "unit_name": name_values[n],
+             "grade": grade_values[g], "completed": bool(done)}
+            for c, n, g, done in zip(self.codes, self.names, self.grades, self.completed)
+        ]
+
+    def passed_codes(self) -> set:
+        """Same as ``graduation.passed_codes`` over the rows."""
+        codes, passes = self.tables.codes, self.tables.grades.counts_as_pass
+        norm, code_values = codes.normalized, codes.values
+        return {norm[c] for c, g, done in zip(self.codes, self.grades, self.completed)
+                if done and passes[g] and code_values[c]}
+
+    def normalized_codes(self) -> set:
+        """Normalized codes of every row with a unit code."""
+        codes = self.tables.codes
+        norm, code_values = codes.normalized, codes.values
+        # built in row order: evaluate_graduation fills electives in set iteration order
+        return {norm[c] for c in self.codes if code_values[c]}
+
+    def total_credits(self) -> float:
+        """Same as ``graduation.total_credits`` over the rows."""
+        credits, passes = self.tables.codes.credits, self.tables.grades.counts_as_pass
+        return sum(credits[c] for c, g, done in zip(self.codes, self.grades, self.completed) if done and passes[g])
+
+    def entries(self) -> Iterator[Tuple[str, bool, bool]]:
+        """(normalized code, counts as passed, graded as not passed) for each row with a unit code."""
+        codes, grades = self.tables.codes, self.tables.grades
+        norm, code_values = codes.normalized, codes.values
+        passes, is_passed = grades.counts_as_pass, grades.is_passed
+        for c, g, done in zip(self.codes, self.grades, self.completed):
+            if code_values[c]:
+                yield norm[c], bool(done) and passes[g], not is_passed[g]
+
+    def nbytes(self) -> int:
+        arrays = (self.codes, self.names, self.grades, self.completed)
+        return sys.getsizeof(self) + sum(sys.getsizeof(a) for a in arrays)
+
+
+class TranscriptStore:
+    """Transcripts of many students, keyed by student id."""
+
+    def __init__(self, rows: Iterable[dict] = ()):
+        self.transcripts: Dict[Any, Transcript] = {}
+        self.tables = Tables()
+        self.extend(rows)
+
+    def extend(self, rows: Iterable[dict]) -> None:
+        """Add rows (in any student order); call once per fetched page."""
+        transcripts, tables = self.transcripts, self.tables
+        for row in rows:
+            student_id = row.get("student_id")
+            transcript = transcripts.get(student_id)
+            if transcript is None:
+                transcript = transcripts[student_id] = Transcript(student_id, tables)
+            transcript.append(row)
+
+    def get(self, student_id) -> Transcript:
+        """The student's transcript; an empty one if they have no rows."""
+        return self.transcripts.get(student_id) or Transcript(student_id, self.tables)
+
+    def __contains__(self, student_id):
+        return student_id in self.transcripts
+
+    def __len__(self):
+        return len(self.transcripts)
+
+    def row_count(self) -> int:
+        return sum(len(t) for t in self.transcripts.values())
+
+    def nbytes(self) -> int:
+        """Approximate memory held by this store (its intern tables are not counted)."""
+        return sys.getsizeof(self.transcripts) + sum(t.nbytes() for t in self.transcripts.values())
+
+    def to_frame(self, columns: Sequence[str] = ("student_id", "unit_code", "unit_name", "grade", "completed")):
+        """A DataFrame of every row; codes, names and grades are categoricals over the intern tables."""
+        student_ids: List[Any] = []
+        code_ids, name_ids, grade_ids, completed = array("H"), array("H"), array("B"), array("B")
+        for student_id, t in self.transcripts.items():
+            student_ids.extend([student_id] * len(t))
+            code_ids.extend(t.codes)
+            name_ids.extend(t.names)
+            grade_ids.extend(t.grades)
+            completed.extend(t.completed)
+
+        def categorical(ids: array, table: InternTable):
+            # id 0 is None in every table, which becomes a missing value (-1)
+            return pd.Categorical.from_codes(pd.Series(ids, dtype="int32") - 1, categories=_categories(table))
+
+        data = {
+            "student_id": student_ids,
+            "unit_code": categorical(code_ids, self.tables.codes),
+            "unit_name": categorical(name_ids, self.tables.names),
+            "grade": categorical(grade_ids, self.tables.grades),
+            "completed": pd.Series(completed, dtype="uint8").astype(bool),
+        }
+        return pd.DataFrame({c: data[c] for c in columns})
+
+
+def _categories(table: InternTable) -> List[Any]:
+    return list(table.values[1:])
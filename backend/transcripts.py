@@ -0,0 +1,42 @@
+"""Diffing an uploaded transcript against a student's stored ``student_units``.
+
+Rows are matched by unit code; a code that appears more than once (a
+failed attempt and its retake) is matched occurrence by occurrence, in
+upload order against stored rows in ``id`` order.  Only rows whose
+name, grade or completion changed are updated, so re-uploading a
+transcript with one new grade writes one row instead of all of them.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+COMPARED_FIELDS = ("unit_name", "grade", "completed")
+
+
+def _value(row: dict, field: str):
+    value = row.get(field)
+    if field == "completed":
+        return bool(value)
+    return "" if value is None else str(value)
+
+
+def diff_units(existing: Iterable[dict], uploaded: Iterable[dict]) -> Tuple[List[dict], List[dict], List, int]:
+    """(rows to insert, rows to update (with ``id``), ids to delete, unchanged count)."""
+    stored: Dict[str, List[dict]] = defaultdict(list)
+    for row in sorted(existing, key=lambda r: r["id"]):
+        stored[str(row.get("unit_code"))].append(row)
+
+    inserts, updates, unchanged = [], [], 0
+    for row in uploaded:
+        bucket = stored.get(str(row.get("unit_code")))
+        if not bucket:
+            inserts.append(row)
+            continue
+        current = bucket.pop(0)
+        if any(_value(current, f) != _value(row, f) for f in COMPARED_FIELDS):
+            updates.append({**row, "id": current["id"]})
+        else:
+            unchanged += 1
+
+    deletes = [row["id"] for rows in stored.values() for row in rows]
+    return inserts, updates, deletes, unchanged
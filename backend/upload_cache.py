@@ -0,0 +1,138 @@
+"""Content-addressed cache for spreadsheet uploads.
+
+Uploads are hashed (SHA-256) on arrival.  Two things are remembered:
+
+* the outcome of each successful upload, keyed by (kind, target, hash,
+  options such as ``overwrite``), in a small SQLite file so it survives
+  restarts and is shared by workers on one host (``UPLOAD_CACHE_DB``,
+  default a file per Supabase project in a private per-user directory,
+  see ``private_dir``).  An identical resubmission for the same
+  target within ``UPLOAD_CACHE_TTL`` seconds (default an hour) gets the
+  stored outcome back without touching the database.  Any other write to
+  a target forgets its outcomes;
+* parsed workbooks, keyed by hash and read options, in an in-process LRU,
+  so a file that has to be processed again (``force=true``, another target
+  or a different ``overwrite``) is not parsed twice.
+
+Set ``UPLOAD_CACHE_TTL=0`` to turn the outcome store off.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+import private_dir
+from cache import Cache
+from lazy_imports import LazyModule
+
+pd = LazyModule("pandas")
+
+DB_PATH = os.getenv("UPLOAD_CACHE_DB")  # None: private_dir.private_path("upload-cache", ".sqlite")
+TTL = float(os.getenv("UPLOAD_CACHE_TTL", "3600"))
+MAX_OUTCOMES = 5000
+
+frames = Cache("upload_frames", maxsize=int(os.getenv("UPLOAD_FRAME_CACHE_SIZE", "32")))
+stats: Dict[str, int] = {"outcome_hits": 0, "outcome_misses": 0, "outcomes_stored": 0, "parses": 0}
+
+
+def digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def read_excel(content: bytes, sha: Optional[str] = None, **kwargs):
+    """``pd.read_excel`` of an upload, parsed once per (hash, options).
+
+    Returns a copy, so callers may rename or filter the frame freely.
+    """
+    key = (sha or digest(content), tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+    df = frames.get(key)
+    if df is None:
+        stats["parses"] += 1
+        df = pd.read_excel(BytesIO(content), **kwargs)
+        frames.set(key, df)
+    return df.copy()
+
+
+class OutcomeStore:
+    def __init__(self, path: Optional[str] = DB_PATH, ttl: float = TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # resolved on first use, once SUPABASE_URL is loaded from .env
+            path = self.path or private_dir.private_path("upload-cache", ".sqlite")
+            if path is None:
+                raise sqlite3.OperationalError("no private directory for the upload cache")
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outcomes ("
+                " kind TEXT NOT NULL, target TEXT NOT NULL, sha256 TEXT NOT NULL,"
+                " options TEXT NOT NULL, result TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (kind, target, sha256, options))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, kind: str, target: str, sha: str, options: str = "") -> Optional[Dict[str, Any]]:
+        """The stored outcome of an identical upload, or None."""
+        if self.ttl <= 0:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT result, created_at FROM outcomes"
+                    " WHERE kind = ? AND target = ? AND sha256 = ? AND options = ? AND created_at >= ?",
+                    (kind, target, sha, options, time.time() - self.ttl),
+                ).fetchone()
+        except sqlite3.Error as e:
+            print("Upload cache read failed:", e)
+            return None
+        if row is None:
+            stats["outcome_misses"] += 1
+            return None
+        stats["outcome_hits"] += 1
+        return {**json.loads(row[0]), "duplicate_upload": True, "first_uploaded_at": row[1]}
+
+    def put(self, kind: str, target: str, sha: str, result: Dict[str, Any], options: str = "") -> None:
+        if self.ttl <= 0:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO outcomes (kind, target, sha256, options, result, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, target, sha, options, json.dumps(result, default=str), time.time()),
+                )
+                conn.execute("DELETE FROM outcomes WHERE created_at < ?", (time.time() - self.ttl,))
+                conn.execute(
+                    "DELETE FROM outcomes WHERE rowid NOT IN (SELECT rowid FROM outcomes ORDER BY created_at DESC LIMIT ?)",
+                    (MAX_OUTCOMES,),
+                )
+            stats["outcomes_stored"] += 1
+        except sqlite3.Error as e:
+            print("Upload cache write failed:", e)
+
+    def forget(self, kind: str, target: Optional[str] = None) -> None:
+        """Drop stored outcomes after the target was written some other way."""
+        if self.ttl <= 0:
+            return
+        try:
+            with self._lock:
+                if target is None:
+                    self._connect().execute("DELETE FROM outcomes WHERE kind = ?", (kind,))
+                else:
+                    self._connect().execute("DELETE FROM outcomes WHERE kind = ? AND target = ?", (kind, target))
+        except sqlite3.Error as e:
+            print("Upload cache write failed:", e)
+
+
+outcomes = OutcomeStore()